@@ -315,6 +315,16 @@ class BotAI(BotAIInternal):
         logger.debug("Sending message: " + message)
         await self.client.chat_send(message, team_only)
 
+    async def chat_send_many(self, messages: List[str], team_only: bool = False):
+        """Send several chat messages to the SC2 Client in a single request, keeping their order.
+
+        :param messages:
+        :param team_only:"""
+        assert all(isinstance(message, str) for message in messages), f"{messages} contains a non-string"
+        for message in messages:
+            logger.debug("Sending message: " + message)
+        await self.client.chat_send_many(messages, team_only)
+
     def in_map_bounds(self, pos: Union[Point2, tuple, list]) -> bool:
         """Tests if a 2 dimensional point is within the map boundaries of the pixelmaps.
 
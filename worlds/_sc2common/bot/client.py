@@ -258,6 +258,18 @@ class Client(Protocol):
             )
         )
 
+    async def chat_send_many(self, messages: Iterable[str], team_only: bool):
+        """ Writes several messages to the chat, in order, with a single request """
+        ch = ChatChannel.Team if team_only else ChatChannel.Broadcast
+        await self._execute(
+            action=sc_pb.RequestAction(
+                actions=[
+                    sc_pb.Action(action_chat=sc_pb.ActionChat(channel=ch.value, message=message))
+                    for message in messages
+                ]
+            )
+        )
+
     async def debug_kill_unit(self, unit_tags: Union[Unit, Units, List[int], Set[int]]):
         """
         :param unit_tags:
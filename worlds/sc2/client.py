@@ -1,30 +1,26 @@
 from __future__ import annotations
 
 import asyncio
-import copy
-import ctypes
+import collections
+import dataclasses
 import enum
 import functools
+import hashlib
 import inspect
 import logging
-import multiprocessing
+import operator
 import os.path
 import re
 import sys
-import tempfile
 import typing
-import queue
-import zipfile
-import io
 import random
-import concurrent.futures
 import time
-import uuid
 from pathlib import Path
 
 # CommonClient import first to trigger ModuleUpdater
 from CommonClient import CommonContext, server_loop, ClientCommandProcessor, gui_enabled, get_base_parser
 from Utils import init_logging, is_windows, async_start
+import orjson
 from .item import item_names
 from .item.item_groups import item_name_groups, unlisted_item_name_groups
 from . import options
@@ -43,6 +39,10 @@ from .mission_tables import MissionFlag
 from .transfer_data import normalized_unit_types
 from . import SC2World
 
+if typing.TYPE_CHECKING:
+    # requests is imported lazily, only when the client talks to GitHub
+    import requests
+
 
 if __name__ == "__main__":
     init_logging("SC2Client", exception_logger="Client")
@@ -50,13 +50,11 @@ if __name__ == "__main__":
 logger = logging.getLogger("Client")
 sc2_logger = logging.getLogger("Starcraft2")
 
-import nest_asyncio
 from worlds._sc2common import bot
-from worlds._sc2common.bot.data import Race
-from worlds._sc2common.bot.main import run_game
-from worlds._sc2common.bot.player import Bot
+# bot_ai, maps and paths are reached through the package attribute below
+from worlds._sc2common.bot import bot_ai, maps, paths  # noqa: F401
 from worlds.sc2.item.item_tables import (
-    lookup_id_to_name, get_full_item_list, ItemData,
+    lookup_id_to_name, lookup_id_to_item_data, get_full_item_list,
     race_to_item_type, ZergItemType, ProtossItemType, upgrade_bundles,
     WEAPON_ARMOR_UPGRADE_MAX_LEVEL,
 )
@@ -66,14 +64,10 @@ from .mission_tables import (
     lookup_id_to_campaign, SC2Mission, campaign_mission_table, SC2Race
 )
 
-import colorama
 from .options import Option, upgrade_included_names
 from NetUtils import ClientStatus, NetworkItem, JSONtoTextParser, JSONMessagePart, add_json_item, add_json_location, add_json_text, JSONTypes
 from MultiServer import mark_raw
 
-pool = concurrent.futures.ThreadPoolExecutor(1)
-loop = asyncio.get_event_loop_policy().new_event_loop()
-nest_asyncio.apply(loop)
 MAX_BONUS: int = 28
 VICTORY_MODULO: int = 100
 
@@ -81,6 +75,7 @@ VICTORY_MODULO: int = 100
 DATA_REPO_OWNER = "Ziktofel"
 DATA_REPO_NAME = "Archipelago-SC2-data"
 DATA_API_VERSION = "API4"
+ZIP_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
 
 # Bot controller
 CONTROLLER_HEALTH: int = 38281
@@ -97,10 +92,51 @@ TRADE_DATASTORAGE_LOCK = "_lock"
 TRADE_LOCK_TIME = 5000 # Time in ms that the DataStorage may be considered safe to edit
 TRADE_LOCK_WAIT_LIMIT = 540000 / 1.4 # Time in ms that the client may spend trying to get a lock (540000 = 9 minutes, 1.4 is 'faster' game speed's time scale)
 
+# Install path of the latest SC2 version, as listed in ExecuteInfo.txt
+_EXECUTE_INFO_BASE_PATH = re.compile(r" = (.*)Versions")
+
 # Games
 STARCRAFT2 = "Starcraft 2"
 STARCRAFT2_WOL = "Starcraft 2 Wings of Liberty"
 
+# Client command argument tables
+_DIFFICULTY_MAP: typing.Dict[str, int] = {"casual": 0, "normal": 1, "hard": 2, "brutal": 3}
+_GAME_SPEED_MAP: typing.Dict[str, int] = {
+    "default": 0, "slower": 1, "slow": 2, "normal": 3, "fast": 4, "faster": 5,
+}
+_PLAYER_COLORS: typing.Tuple[str, ...] = (
+    "White", "Red", "Blue", "Teal",
+    "Purple", "Yellow", "Orange", "Green",
+    "LightPink", "Violet", "LightGrey", "DarkGreen",
+    "Brown", "LightGreen", "DarkGrey", "Pink",
+    "Rainbow", "Mengsk", "BrightLime", "Arcane", "Ember", "HotPink",
+    "Random", "Default"
+)
+# "Random" and "Default" are not valid outcomes of a random pick
+_RANDOMIZABLE_COLORS: typing.Tuple[str, ...] = _PLAYER_COLORS[:-2]
+_PLAYER_COLOR_INDEX: typing.Dict[str, int] = {
+    player_color.lower(): index for index, player_color in enumerate(_PLAYER_COLORS)
+}
+
+# Search tables for /received, built once from the static item tables
+_ITEM_NAME_TO_CODE: typing.Dict[str, int] = {
+    item_name: item_data.code for item_name, item_data in get_full_item_list().items()
+}
+_CASEFOLD_ITEM_NAMES: typing.Dict[int, str] = {
+    item_data.code: item_name.casefold() for item_name, item_data in get_full_item_list().items()
+}
+_CASEFOLD_GROUPS: typing.Dict[str, str] = {}
+for _group_name in item_name_groups:
+    if _group_name not in unlisted_item_name_groups:
+        _CASEFOLD_GROUPS.setdefault(_group_name.casefold(), _group_name)
+_GROUP_ID_SETS: typing.Dict[str, typing.FrozenSet[int]] = {
+    group_name: frozenset(
+        get_full_item_list()[item_name].code for item_name in item_name_groups[group_name]
+        if item_name in get_full_item_list()
+    )
+    for group_name in _CASEFOLD_GROUPS.values()
+}
+
 
 # Data version file path.
 # This file is used to tell if the downloaded data are outdated
@@ -109,6 +145,55 @@ def get_metadata_file() -> str:
     return os.environ["SC2PATH"] + os.sep + "ArchipelagoSC2Metadata.txt"
 
 
+# The client's mission order reduced to what calc_available_nodes() walks:
+# (layout index, layout entry rule, (mission id, entry rule) of each non-empty slot)
+MissionOrderLayoutNode = typing.Tuple[int, SubRuleRuleData, typing.List[typing.Tuple[int, SubRuleRuleData]]]
+# (campaign index, campaign entry rule, its layouts)
+MissionOrderCampaignNode = typing.Tuple[int, SubRuleRuleData, typing.List[MissionOrderLayoutNode]]
+# (available mission ids, available layout indices by campaign index, available campaign indices)
+AvailableNodes = typing.Tuple[typing.List[int], typing.Dict[int, typing.List[int]], typing.List[int]]
+# Top-level keys of multi-campaign legacy mission_req slot data
+_CAMPAIGN_ID_STRINGS: typing.FrozenSet[str] = frozenset(str(campaign.id) for campaign in SC2Campaign)
+# (attribute, slot data key, default) for slot data values that are copied onto SC2Context as-is
+_SLOT_DATA_FIELDS: typing.Tuple[typing.Tuple[str, str, typing.Any], ...] = (
+    ("game_speed", "game_speed", GameSpeed.option_default),
+    ("disable_forced_camera", "disable_forced_camera", DisableForcedCamera.default),
+    ("skip_cutscenes", "skip_cutscenes", SkipCutscenes.default),
+    ("generic_upgrade_missions", "generic_upgrade_missions", GenericUpgradeMissions.default),
+    ("generic_upgrade_items", "generic_upgrade_items", GenericUpgradeItems.option_individual_items),
+    ("generic_upgrade_research", "generic_upgrade_research", GenericUpgradeResearch.option_vanilla),
+    ("kerrigan_presence", "kerrigan_presence", KerriganPresence.option_vanilla),
+    ("kerrigan_primal_status", "kerrigan_primal_status", KerriganPrimalStatus.option_vanilla),
+    ("kerrigan_levels_per_mission_completed", "kerrigan_levels_per_mission_completed", 0),
+    ("kerrigan_levels_per_mission_completed_cap", "kerrigan_levels_per_mission_completed_cap", -1),
+    ("kerrigan_total_level_cap", "kerrigan_total_level_cap", -1),
+    ("enable_morphling", "enable_morphling", EnableMorphling.option_false),
+    ("grant_story_tech", "grant_story_tech", GrantStoryTech.option_false),
+    ("grant_story_levels", "grant_story_levels", GrantStoryLevels.option_additive),
+    ("required_tactics", "required_tactics", RequiredTactics.option_standard),
+    ("take_over_ai_allies", "take_over_ai_allies", TakeOverAIAllies.option_false),
+    ("spear_of_adun_presence", "spear_of_adun_presence", SpearOfAdunPresence.option_not_present),
+    ("spear_of_adun_present_in_no_build", "spear_of_adun_present_in_no_build", SpearOfAdunPresentInNoBuild.option_false),
+    ("spear_of_adun_autonomously_cast_ability_presence", "spear_of_adun_autonomously_cast_ability_presence", SpearOfAdunAutonomouslyCastAbilityPresence.option_not_present),
+    ("spear_of_adun_autonomously_cast_present_in_no_build", "spear_of_adun_autonomously_cast_present_in_no_build", SpearOfAdunAutonomouslyCastPresentInNoBuild.option_false),
+    ("minerals_per_item", "minerals_per_item", 15),
+    ("vespene_per_item", "vespene_per_item", 15),
+    ("starting_supply_per_item", "starting_supply_per_item", 2),
+    ("nova_covert_ops_only", "nova_covert_ops_only", False),
+    ("trade_enabled", "enable_void_trade", EnableVoidTrade.option_false),
+)
+
+
+def _json_clone(value: typing.Any) -> typing.Any:
+    """Copies JSON-shaped data; cheaper than copy.deepcopy as str/int/float/bool/None are returned as-is"""
+    value_type = type(value)
+    if value_type is dict:
+        return {key: _json_clone(item) for key, item in value.items()}
+    if value_type is list:
+        return [_json_clone(item) for item in value]
+    return value
+
+
 def _remap_color_option(slot_data_version: int, color: int) -> int:
     """Remap colour options for backwards compatibility with older slot data"""
     if slot_data_version < 4 and color == ColorChoice.option_mengsk:
@@ -116,11 +201,30 @@ def _remap_color_option(slot_data_version: int, color: int) -> int:
     return color
 
 
+@functools.lru_cache(maxsize=1)
+def _build_item_category_index() -> typing.Tuple[
+    typing.Dict[SC2Race, typing.Tuple[int, ...]], typing.Dict[int, typing.Tuple[int, ...]]
+]:
+    """Groups top-level item ids by race, and child item ids by their parent's id"""
+    categorized_items: typing.DefaultDict[SC2Race, typing.List[int]] = collections.defaultdict(list)
+    parent_to_child: typing.DefaultDict[int, typing.List[int]] = collections.defaultdict(list)
+    for item_data in get_full_item_list().values():
+        if item_data.parent_item:
+            parent_to_child[_ITEM_NAME_TO_CODE[item_data.parent_item]].append(item_data.code)
+        else:
+            categorized_items[item_data.race].append(item_data.code)
+    return (
+        {race: tuple(item_ids) for race, item_ids in categorized_items.items()},
+        {parent: tuple(children) for parent, children in parent_to_child.items()},
+    )
+
+
 class ConfigurableOptionType(enum.Enum):
     INTEGER = enum.auto()
     ENUM = enum.auto()
 
-class ConfigurableOptionInfo(typing.NamedTuple):
+@dataclasses.dataclass(frozen=True)
+class ConfigurableOptionInfo:
     name: str
     variable_name: str
     option_class: typing.Type[Option]
@@ -152,6 +256,78 @@ class ColouredMessage:
         ctx.on_print_json({"data": self.parts, "cmd": "PrintJSON"})
 
 
+_CONFIGURABLE_OPTIONS: typing.Tuple[ConfigurableOptionInfo, ...] = (
+    ConfigurableOptionInfo('kerrigan_presence', 'kerrigan_presence', options.KerriganPresence, can_break_logic=True),
+    ConfigurableOptionInfo('kerrigan_level_cap', 'kerrigan_total_level_cap', options.KerriganTotalLevelCap, ConfigurableOptionType.INTEGER, can_break_logic=True),
+    ConfigurableOptionInfo('kerrigan_mission_level_cap', 'kerrigan_levels_per_mission_completed_cap', options.KerriganLevelsPerMissionCompletedCap, ConfigurableOptionType.INTEGER),
+    ConfigurableOptionInfo('kerrigan_levels_per_mission', 'kerrigan_levels_per_mission_completed', options.KerriganLevelsPerMissionCompleted, ConfigurableOptionType.INTEGER),
+    ConfigurableOptionInfo('grant_story_levels', 'grant_story_levels', options.GrantStoryLevels, can_break_logic=True),
+    ConfigurableOptionInfo('grant_story_tech', 'grant_story_tech', options.GrantStoryTech, can_break_logic=True),
+    ConfigurableOptionInfo('control_ally', 'take_over_ai_allies', options.TakeOverAIAllies, can_break_logic=True),
+    ConfigurableOptionInfo('soa_presence', 'spear_of_adun_presence', options.SpearOfAdunPresence, can_break_logic=True),
+    ConfigurableOptionInfo('soa_in_nobuilds', 'spear_of_adun_present_in_no_build', options.SpearOfAdunPresentInNoBuild, can_break_logic=True),
+    # Note(mm): Technically SOA passive presence is in the logic for Amon's Fall if Takeover AI Allies is true,
+    # but that's edge case enough I don't think we should warn about it.
+    ConfigurableOptionInfo('soa_passive_presence', 'spear_of_adun_autonomously_cast_ability_presence', options.SpearOfAdunAutonomouslyCastAbilityPresence),
+    ConfigurableOptionInfo('soa_passives_in_nobuilds', 'spear_of_adun_autonomously_cast_present_in_no_build', options.SpearOfAdunAutonomouslyCastPresentInNoBuild),
+    ConfigurableOptionInfo('minerals_per_item', 'minerals_per_item', options.MineralsPerItem, ConfigurableOptionType.INTEGER),
+    ConfigurableOptionInfo('gas_per_item', 'vespene_per_item', options.VespenePerItem, ConfigurableOptionType.INTEGER),
+    ConfigurableOptionInfo('supply_per_item', 'starting_supply_per_item', options.StartingSupplyPerItem, ConfigurableOptionType.INTEGER),
+    ConfigurableOptionInfo('no_forced_camera', 'disable_forced_camera', options.DisableForcedCamera),
+    ConfigurableOptionInfo('skip_cutscenes', 'skip_cutscenes', options.SkipCutscenes),
+    ConfigurableOptionInfo('enable_morphling', 'enable_morphling', options.EnableMorphling, can_break_logic=True),
+)
+_CONFIGURABLE_OPTIONS_BY_NAME: typing.Dict[str, ConfigurableOptionInfo] = {
+    option.name: option for option in _CONFIGURABLE_OPTIONS
+}
+_BOOLEAN_OPTION_MAP: typing.Dict[str, str] = {
+    'y': 'true', 'yes': 'true', 'n': 'false', 'no': 'false',
+}
+_OPTION_HELP_LINES: typing.Dict[type, str] = {
+    option_class: inspect.cleandoc(option_class.__doc__ or "No description provided.").split('\n', 1)[0]
+    for option_class in {option.option_class for option in _CONFIGURABLE_OPTIONS}
+}
+_OPTION_VALUES: typing.Dict[type, str] = {
+    option_class: " | ".join(option_class.options)
+    for option_class in {option.option_class for option in _CONFIGURABLE_OPTIONS}
+}
+
+
+def _build_option_help_parts() -> typing.List[JSONMessagePart]:
+    logic_warning = "  *Note changing this may result in logically unbeatable games*\n"
+    warning_colour = "salmon"
+    cmd_colour = "slateblue"
+    help_message = ColouredMessage(inspect.cleandoc("""
+        Options
+    --------------------
+    """))('\n')
+    for option in _CONFIGURABLE_OPTIONS:
+        help_message.coloured(option.name, cmd_colour)(
+            f": {_OPTION_VALUES[option.option_class]} -- {_OPTION_HELP_LINES[option.option_class]}\n"
+        )
+        if option.can_break_logic:
+            help_message.coloured(logic_warning, warning_colour)
+    help_message("--------------------\nEnter an option without arguments to see its current value.\n")
+    return help_message.parts
+
+
+_OPTION_HELP_PARTS: typing.List[JSONMessagePart] = _build_option_help_parts()
+
+
+def _received_item_parts(prefix: str, item: NetworkItem, slot: int) -> typing.List[JSONMessagePart]:
+    """Builds the "<prefix><item> from <location> by <player>" message parts for a received item"""
+    parts: typing.List[JSONMessagePart] = [
+        {"text": str(item.item), "player": slot, "flags": item.flags, "type": JSONTypes.item_id},
+        {"text": " from ", "keep_markup": False},
+        {"text": str(item.location), "player": item.player, "type": JSONTypes.location_id},
+        {"text": " by ", "keep_markup": False},
+        {"text": str(item.player), "type": JSONTypes.player_id},
+    ]
+    if prefix:
+        parts.insert(0, {"text": prefix, "keep_markup": False})
+    return parts
+
+
 class StarcraftClientProcessor(ClientCommandProcessor):
     ctx: SC2Context
 
@@ -168,18 +344,11 @@ class StarcraftClientProcessor(ClientCommandProcessor):
         num_arguments = len(arguments)
 
         if num_arguments > 0:
-            difficulty_choice = arguments[0].lower()
-            if difficulty_choice == "casual":
-                self.ctx.difficulty_override = 0
-            elif difficulty_choice == "normal":
-                self.ctx.difficulty_override = 1
-            elif difficulty_choice == "hard":
-                self.ctx.difficulty_override = 2
-            elif difficulty_choice == "brutal":
-                self.ctx.difficulty_override = 3
-            else:
+            difficulty_choice = _DIFFICULTY_MAP.get(arguments[0].lower())
+            if difficulty_choice is None:
                 self.output("Unable to parse difficulty '" + arguments[0] + "'")
                 return False
+            self.ctx.difficulty_override = difficulty_choice
 
             self.output("Difficulty set to " + arguments[0])
             return True
@@ -203,22 +372,11 @@ class StarcraftClientProcessor(ClientCommandProcessor):
         num_arguments = len(arguments)
 
         if num_arguments > 0:
-            speed_choice = arguments[0].lower()
-            if speed_choice == "default":
-                self.ctx.game_speed_override = 0
-            elif speed_choice == "slower":
-                self.ctx.game_speed_override = 1
-            elif speed_choice == "slow":
-                self.ctx.game_speed_override = 2
-            elif speed_choice == "normal":
-                self.ctx.game_speed_override = 3
-            elif speed_choice == "fast":
-                self.ctx.game_speed_override = 4
-            elif speed_choice == "faster":
-                self.ctx.game_speed_override = 5
-            else:
+            speed_choice = _GAME_SPEED_MAP.get(arguments[0].lower())
+            if speed_choice is None:
                 self.output("Unable to parse game speed '" + arguments[0] + "'")
                 return False
+            self.ctx.game_speed_override = speed_choice
 
             self.output("Game speed set to " + arguments[0])
             return True
@@ -241,70 +399,67 @@ class StarcraftClientProcessor(ClientCommandProcessor):
         """List received items.
         Pass in a parameter to filter the search by partial item name or exact item group.
         Use '/received recent <number>' to list the last 'number' items received (default 20)."""
-        if filter_search.casefold().startswith('recent'):
-            return self._received_recent(filter_search[len('recent'):].strip())
+        if filter_search[:6].lower() == 'recent':
+            return self._received_recent(filter_search[6:].strip())
         # Groups must be matched case-sensitively, so we properly capitalize the search term
         # eg. "Spear of Adun" over "Spear Of Adun" or "spear of adun"
         # This fails a lot of item name matches, but those should be found by partial name match
-        group_filter = ''
-        for group_name in item_name_groups:
-            if group_name in unlisted_item_name_groups:
-                continue
-            if filter_search.casefold() == group_name.casefold():
-                group_filter = group_name
-                break
+        needle = filter_search.casefold()
+        group_filter = _CASEFOLD_GROUPS.get(needle, '')
+        group_ids = _GROUP_ID_SETS[group_filter] if group_filter else frozenset()
+
+        filter_results: typing.Dict[int, bool] = {}
 
-        def item_matches_filter(item_name: str) -> bool:
+        def item_matches_filter(item_id: int) -> bool:
+            result = filter_results.get(item_id)
+            if result is not None:
+                return result
             # The filter can be an exact group name or a partial item name
             # Partial item name can be matched case-insensitively
-            if filter_search.casefold() in item_name.casefold():
-                return True
+            item_name = _CASEFOLD_ITEM_NAMES.get(item_id)
+            if item_name is None:
+                item_name = self.ctx.item_names.lookup_in_game(item_id).casefold()
             # The search term should already be formatted as a group name
-            if group_filter and item_name in item_name_groups[group_filter]:
-                return True
-            return False
+            result = filter_results[item_id] = needle in item_name or item_id in group_ids
+            return result
 
-        items = get_full_item_list()
-        categorized_items: typing.Dict[SC2Race, typing.List[int]] = {}
-        parent_to_child: typing.Dict[int, typing.List[int]] = {}
-        items_received: typing.Dict[int, typing.List[NetworkItem]] = {}
+        categorized_items, parent_to_child = _build_item_category_index()
+        slot = self.ctx.slot
+        items_received: typing.DefaultDict[int, typing.List[NetworkItem]] = collections.defaultdict(list)
         filter_match_count = 0
         for item in self.ctx.items_received:
-            items_received.setdefault(item.item, []).append(item)
-        items_received_set = set(items_received)
-        for item_data in items.values():
-            if item_data.parent_item:
-                parent_to_child.setdefault(items[item_data.parent_item].code, []).append(item_data.code)
-            else:
-                categorized_items.setdefault(item_data.race, []).append(item_data.code)
+            items_received[item.item].append(item)
+        # All lines are collected into a single PrintJSON message
+        message_parts: typing.List[JSONMessagePart] = []
+        def add_line(line_parts: typing.List[JSONMessagePart]) -> None:
+            if message_parts:
+                message_parts.append({"text": "\n"})
+            message_parts.extend(line_parts)
+
         for faction in SC2Race:
             has_printed_faction_title = False
             def print_faction_title():
                 if not has_printed_faction_title:
-                    self.formatted_print(f" [u]{faction.name}[/u] ")
+                    add_line([{"text": f" [u]{faction.name}[/u] ", "keep_markup": True}])
             
-            for item_id in categorized_items[faction]:
-                item_name = self.ctx.item_names.lookup_in_game(item_id)
-                received_child_items = items_received_set.intersection(parent_to_child.get(item_id, []))
-                matching_children = [child for child in received_child_items
-                                     if item_matches_filter(self.ctx.item_names.lookup_in_game(child))]
+            for item_id in categorized_items.get(faction, ()):
+                children = parent_to_child.get(item_id)
+                received_child_items = [child for child in children if child in items_received] if children else ()
+                matching_children = [child for child in received_child_items if item_matches_filter(child)]
                 received_items_of_this_type = items_received.get(item_id, [])
-                item_is_match = item_matches_filter(item_name)
-                if item_is_match or len(matching_children) > 0:
+                item_is_match = item_matches_filter(item_id)
+                if item_is_match or matching_children:
                     # Print found item if it or its children match the filter
                     if item_is_match:
                         filter_match_count += len(received_items_of_this_type)
                     for item in received_items_of_this_type:
                         print_faction_title()
                         has_printed_faction_title = True
-                        (ColouredMessage('* ').item(item.item, self.ctx.slot, flags=item.flags)
-                            (" from ").location(item.location, item.player)
-                            (" by ").player(item.player)
-                        ).send(self.ctx)
+                        add_line(_received_item_parts('* ', item, slot))
                 
                 if received_child_items:
                     # We have this item's children
-                    if len(matching_children) == 0:
+                    if not matching_children:
                         # ...but none of them match the filter
                         continue
 
@@ -312,24 +467,28 @@ class StarcraftClientProcessor(ClientCommandProcessor):
                         # We didn't receive the item itself
                         print_faction_title()
                         has_printed_faction_title = True
-                        ColouredMessage("- ").coloured(item_name, "black")(" - not obtained").send(self.ctx)
+                        add_line(ColouredMessage("- ").coloured(
+                            self.ctx.item_names.lookup_in_game(item_id), "black"
+                        )(" - not obtained").parts)
                     
                     for child_item in matching_children:
                         received_items_of_this_type = items_received.get(child_item, [])
                         for item in received_items_of_this_type:
                             filter_match_count += len(received_items_of_this_type)
-                            (ColouredMessage('  * ').item(item.item, self.ctx.slot, flags=item.flags)
-                                (" from ").location(item.location, item.player)
-                                (" by ").player(item.player)
-                            ).send(self.ctx)
+                            add_line(_received_item_parts('  * ', item, slot))
                     
                     non_matching_children = len(received_child_items) - len(matching_children)
                     if non_matching_children > 0:
-                        self.formatted_print(f"  + {non_matching_children} child items that don't match the filter")
+                        add_line([{
+                            "text": f"  + {non_matching_children} child items that don't match the filter",
+                            "keep_markup": True,
+                        }])
         if filter_search == "":
-            self.formatted_print(f"[b]Obtained: {len(self.ctx.items_received)} items[/b]")
+            summary = f"[b]Obtained: {len(self.ctx.items_received)} items[/b]"
         else:
-            self.formatted_print(f"[b]Filter \"{filter_search}\" found {filter_match_count} out of {len(self.ctx.items_received)} obtained items[/b]")
+            summary = f"[b]Filter \"{filter_search}\" found {filter_match_count} out of {len(self.ctx.items_received)} obtained items[/b]"
+        add_line([{"text": summary, "keep_markup": True}])
+        self.ctx.on_print_json({"data": message_parts, "cmd": "PrintJSON"})
         return True
 
     def _received_recent(self, amount: str) -> None:
@@ -338,94 +497,48 @@ class StarcraftClientProcessor(ClientCommandProcessor):
         except ValueError:
             display_amount = 20
         display_amount = min(display_amount, len(self.ctx.items_received))
-        self.formatted_print(f"Last {display_amount} of {len(self.ctx.items_received)} items received (most recent last):")
+        slot = self.ctx.slot
+        message_parts: typing.List[JSONMessagePart] = [{
+            "text": f"Last {display_amount} of {len(self.ctx.items_received)} items received (most recent last):",
+            "keep_markup": True,
+        }]
         for item in self.ctx.items_received[-display_amount:]:
-            (
-                ColouredMessage()
-                .item(item.item, self.ctx.slot, item.flags)
-                (" from ").location(item.location, item.player)
-                (" by ").player(item.player)
-            ).send(self.ctx)
+            message_parts.append({"text": "\n"})
+            message_parts.extend(_received_item_parts('', item, slot))
+        self.ctx.on_print_json({"data": message_parts, "cmd": "PrintJSON"})
         return True
 
     def _cmd_option(self, option_name: str = "", option_value: str = "") -> None:
         """Sets a Starcraft game option that can be changed after generation. Use "/option list" to see all options."""
-
-        LOGIC_WARNING = f"  *Note changing this may result in logically unbeatable games*\n"
-
-        configurable_options = (
-            ConfigurableOptionInfo('kerrigan_presence', 'kerrigan_presence', options.KerriganPresence, can_break_logic=True),
-            ConfigurableOptionInfo('kerrigan_level_cap', 'kerrigan_total_level_cap', options.KerriganTotalLevelCap, ConfigurableOptionType.INTEGER, can_break_logic=True),
-            ConfigurableOptionInfo('kerrigan_mission_level_cap', 'kerrigan_levels_per_mission_completed_cap', options.KerriganLevelsPerMissionCompletedCap, ConfigurableOptionType.INTEGER),
-            ConfigurableOptionInfo('kerrigan_levels_per_mission', 'kerrigan_levels_per_mission_completed', options.KerriganLevelsPerMissionCompleted, ConfigurableOptionType.INTEGER),
-            ConfigurableOptionInfo('grant_story_levels', 'grant_story_levels', options.GrantStoryLevels, can_break_logic=True),
-            ConfigurableOptionInfo('grant_story_tech', 'grant_story_tech', options.GrantStoryTech, can_break_logic=True),
-            ConfigurableOptionInfo('control_ally', 'take_over_ai_allies', options.TakeOverAIAllies, can_break_logic=True),
-            ConfigurableOptionInfo('soa_presence', 'spear_of_adun_presence', options.SpearOfAdunPresence, can_break_logic=True),
-            ConfigurableOptionInfo('soa_in_nobuilds', 'spear_of_adun_present_in_no_build', options.SpearOfAdunPresentInNoBuild, can_break_logic=True),
-            # Note(mm): Technically SOA passive presence is in the logic for Amon's Fall if Takeover AI Allies is true,
-            # but that's edge case enough I don't think we should warn about it.
-            ConfigurableOptionInfo('soa_passive_presence', 'spear_of_adun_autonomously_cast_ability_presence', options.SpearOfAdunAutonomouslyCastAbilityPresence),
-            ConfigurableOptionInfo('soa_passives_in_nobuilds', 'spear_of_adun_autonomously_cast_present_in_no_build', options.SpearOfAdunAutonomouslyCastPresentInNoBuild),
-            ConfigurableOptionInfo('minerals_per_item', 'minerals_per_item', options.MineralsPerItem, ConfigurableOptionType.INTEGER),
-            ConfigurableOptionInfo('gas_per_item', 'vespene_per_item', options.VespenePerItem, ConfigurableOptionType.INTEGER),
-            ConfigurableOptionInfo('supply_per_item', 'starting_supply_per_item', options.StartingSupplyPerItem, ConfigurableOptionType.INTEGER),
-            ConfigurableOptionInfo('no_forced_camera', 'disable_forced_camera', options.DisableForcedCamera),
-            ConfigurableOptionInfo('skip_cutscenes', 'skip_cutscenes', options.SkipCutscenes),
-            ConfigurableOptionInfo('enable_morphling', 'enable_morphling', options.EnableMorphling, can_break_logic=True),
-        )
-
-        WARNING_COLOUR = "salmon"
-        CMD_COLOUR = "slateblue"
-        boolean_option_map = {
-            'y': 'true', 'yes': 'true', 'n': 'false', 'no': 'false',
-        }
-
-        help_message = ColouredMessage(inspect.cleandoc("""
-            Options
-        --------------------
-        """))('\n')
-        for option in configurable_options:
-            option_help_text = inspect.cleandoc(option.option_class.__doc__ or "No description provided.").split('\n', 1)[0]
-            help_message.coloured(option.name, CMD_COLOUR)(": " + " | ".join(option.option_class.options)
-                + f" -- {option_help_text}\n")
-            if option.can_break_logic:
-                help_message.coloured(LOGIC_WARNING, WARNING_COLOUR)
-        help_message("--------------------\nEnter an option without arguments to see its current value.\n")
-
         if not option_name or option_name == 'list' or option_name == 'help':
-            help_message.send(self.ctx)
+            self._send_option_help()
             return
-        for option in configurable_options:
-            if option_name == option.name:
-                option_value = boolean_option_map.get(option_value, option_value)
-                if not option_value:
-                    pass
-                elif option.option_type == ConfigurableOptionType.ENUM and option_value in option.option_class.options:
-                    self.ctx.__dict__[option.variable_name] = option.option_class.options[option_value]
-                elif option.option_type == ConfigurableOptionType.INTEGER:
-                    try:
-                        self.ctx.__dict__[option.variable_name] = int(option_value, base=0)
-                    except:
-                        self.output(f"{option_value} is not a valid integer")
-                else:
-                    self.output(f"Unknown option value '{option_value}'")
-                ColouredMessage(f"{option.name} is '{option.option_class.get_option_name(self.ctx.__dict__[option.variable_name])}'").send(self.ctx)
-                break
-        else:
+        option = _CONFIGURABLE_OPTIONS_BY_NAME.get(option_name)
+        if option is None:
             self.output(f"Unknown option '{option_name}'")
-            help_message.send(self.ctx)
+            self._send_option_help()
+            return
+        option_value = _BOOLEAN_OPTION_MAP.get(option_value, option_value)
+        if not option_value:
+            pass
+        elif option.option_type == ConfigurableOptionType.ENUM and option_value in option.option_class.options:
+            setattr(self.ctx, option.variable_name, option.option_class.options[option_value])
+        elif option.option_type == ConfigurableOptionType.INTEGER:
+            try:
+                setattr(self.ctx, option.variable_name, int(option_value, base=0))
+            except:
+                self.output(f"{option_value} is not a valid integer")
+        else:
+            self.output(f"Unknown option value '{option_value}'")
+        ColouredMessage(f"{option.name} is '{option.option_class.get_option_name(getattr(self.ctx, option.variable_name))}'").send(self.ctx)
+
+    def _send_option_help(self) -> None:
+        # on_print_json copies the parts before any parser touches them, so the shared list can be sent as-is
+        self.ctx.on_print_json({"data": _OPTION_HELP_PARTS, "cmd": "PrintJSON"})
 
     def _cmd_color(self, faction: str = "", color: str = "") -> None:
         """Changes the player color for a given faction."""
-        player_colors = [
-            "White", "Red", "Blue", "Teal",
-            "Purple", "Yellow", "Orange", "Green",
-            "LightPink", "Violet", "LightGrey", "DarkGreen",
-            "Brown", "LightGreen", "DarkGrey", "Pink",
-            "Rainbow", "Mengsk", "BrightLime", "Arcane", "Ember", "HotPink",
-            "Random", "Default"
-        ]
+        player_colors = _PLAYER_COLORS
         var_names = {
             'raynor': 'player_color_raynor',
             'kerrigan': 'player_color_zerg',
@@ -436,7 +549,7 @@ class StarcraftClientProcessor(ClientCommandProcessor):
         faction = faction.lower()
         if not faction:
             for faction_name, key in var_names.items():
-                self.output(f"Current player color for {faction_name}: {player_colors[self.ctx.__dict__[key]]}")
+                self.output(f"Current player color for {faction_name}: {player_colors[getattr(self.ctx, key)]}")
             self.output("To change your color, add the faction name and color after the command.")
             self.output("Available factions: " + ', '.join(var_names))
             self.output("Available colors: " + ', '.join(player_colors))
@@ -445,20 +558,20 @@ class StarcraftClientProcessor(ClientCommandProcessor):
             self.output(f"Unknown faction '{faction}'.")
             self.output("Available factions: " + ', '.join(var_names))
             return
-        match_colors = [player_color.lower() for player_color in player_colors]
         if not color:
-            self.output(f"Current player color for {faction}: {player_colors[self.ctx.__dict__[var_names[faction]]]}")
+            self.output(f"Current player color for {faction}: {player_colors[getattr(self.ctx, var_names[faction])]}")
             self.output("To change this faction's colors, add the name of the color after the command.")
             self.output("Available colors: " + ', '.join(player_colors))
         else:
-            if color.lower() not in match_colors:
+            color_key = color.lower()
+            if color_key not in _PLAYER_COLOR_INDEX:
                 self.output(color + " is not a valid color.  Available colors: " + ', '.join(player_colors))
                 return
-            if color.lower() == "random":
-                color = random.choice(player_colors[:-2])
-            self.ctx.__dict__[var_names[faction]] = match_colors.index(color.lower())
+            if color_key == "random":
+                color_key = random.choice(_RANDOMIZABLE_COLORS).lower()
+            setattr(self.ctx, var_names[faction], _PLAYER_COLOR_INDEX[color_key])
             self.ctx.pending_color_update = True
-            self.output(f"Color for {faction} set to " + player_colors[self.ctx.__dict__[var_names[faction]]])
+            self.output(f"Color for {faction} set to " + player_colors[getattr(self.ctx, var_names[faction])])
 
     def _cmd_windowed_mode(self, value="") -> None:
         """Controls whether sc2 will launch in Windowed mode. Persists across sessions."""
@@ -493,11 +606,13 @@ class StarcraftClientProcessor(ClientCommandProcessor):
     def _cmd_download_data(self) -> bool:
         """Download the most recent release of the necessary files for playing SC2 with
         Archipelago. Will overwrite existing files."""
-        pool.submit(self._download_data, self.ctx)
+        # Runs on the loop's shared default executor so no thread is reserved for this one-off job
+        asyncio.get_running_loop().run_in_executor(None, self._download_data, self.ctx)
         return True
 
     @staticmethod
     def _download_data(ctx: SC2Context) -> bool:
+        import zipfile
         if "SC2PATH" not in os.environ:
             check_game_install_path()
 
@@ -512,7 +627,8 @@ class StarcraftClientProcessor(ClientCommandProcessor):
 
         if tempzip:
             try:
-                zipfile.ZipFile(tempzip).extractall(path=os.environ["SC2PATH"])
+                with zipfile.ZipFile(tempzip) as zip_ref:
+                    zip_ref.extractall(path=os.environ["SC2PATH"])
                 sc2_logger.info(f"Download complete. Package installed.")
                 if metadata is not None:
                     with open(get_metadata_file(), "w") as f:
@@ -523,6 +639,7 @@ class StarcraftClientProcessor(ClientCommandProcessor):
             sc2_logger.warning("Download aborted/failed. Read the log for more information.")
             return False
         ctx.data_out_of_date = False
+        ctx.refresh_mission_table()
         return True
 
 
@@ -571,9 +688,10 @@ class SC2Context(CommonContext):
         self.enable_morphling = EnableMorphling.default
         self.custom_mission_order: typing.List[CampaignSlotData] = []
         self.mission_id_to_entry_rules: typing.Dict[int, MissionEntryRules]
+        self.mission_order_topology: typing.List[MissionOrderCampaignNode] = []
         self.final_mission_ids: typing.List[int] = [29]
         self.final_locations: typing.List[int] = []
-        self.announcements: queue.Queue = queue.Queue()
+        self.announcements: typing.Deque[str] = collections.deque()
         self.sc2_run_task: typing.Optional[asyncio.Task] = None
         self.missions_unlocked: bool = False  # allow launching missions ignoring requirements
         self.generic_upgrade_missions = 0
@@ -586,6 +704,9 @@ class SC2Context(CommonContext):
         self.difficulty_override = -1
         self.game_speed_override = -1
         self.mission_id_to_location_ids: typing.Dict[int, typing.List[int]] = {}
+        self.mission_id_to_location_id_list: typing.Dict[int, typing.List[int]] = {}
+        self.mission_victory_location_ids: typing.FrozenSet[int] = frozenset()
+        self.total_mission_count: int = 0
         self.last_bot: typing.Optional[ArchipelagoBot] = None
         self.slot_data_version = 2
         self.required_tactics: int = RequiredTactics.default
@@ -603,8 +724,18 @@ class SC2Context(CommonContext):
         self.kerrigan_levels_per_mission_completed = 0
         self.trade_enabled: int = EnableVoidTrade.default
         self.trade_underway: bool = False
-        self.trade_latest_reply: typing.Optional[dict] = None
-        self.trade_reply_event = asyncio.Event()
+        self.trade_pending_replies: typing.Dict[str, asyncio.Future] = {}
+        # Our slot and the groups it belongs to, set on connecting; see CommonContext.slot_concerns_self()
+        self.own_slots: typing.FrozenSet[int] = frozenset()
+        # Item-derived flag words from calculate_items(), extended as items arrive and cleared on connecting
+        self.received_items_state: typing.Optional["_ReceivedItemsState"] = None
+        # Ids of everything in items_received, kept in step with it as ReceivedItems packages arrive
+        self.received_item_ids: typing.Set[int] = set()
+        # calc_available_nodes() result keyed by (checked victory locations, items received count)
+        self.available_nodes_cache: typing.Optional[typing.Tuple[typing.Tuple[typing.FrozenSet[int], int], AvailableNodes]] = None
+        # DataStorage keys for the current team and slot, set on connecting
+        self.trade_storage_team_key: str = f"{TRADE_DATASTORAGE_TEAM}{self.team}"
+        self.trade_storage_slot_key: str = f"{TRADE_DATASTORAGE_SLOT}{self.slot}"
         self.trade_lock_wait: int = 0
         self.trade_lock_start: typing.Optional[int] = None
         self.trade_response: typing.Optional[str] = None
@@ -617,6 +748,12 @@ class SC2Context(CommonContext):
         await self.send_connect()
         if self.ui:
             self.ui.first_check = True
+        self.refresh_mission_table()
+
+    def refresh_mission_table(self) -> None:
+        """Asks the launcher tab to redraw the mission table once the current frame is done."""
+        if self.ui:
+            self.ui.refresh_mission_table()
 
     def is_legacy_game(self):
         return self.game == STARCRAFT2_WOL
@@ -630,14 +767,21 @@ class SC2Context(CommonContext):
             async_start(self.send_connect())
 
     def trade_storage_team(self) -> str:
-        return f"{TRADE_DATASTORAGE_TEAM}{self.team}"
+        return self.trade_storage_team_key
     
     def trade_storage_slot(self) -> str:
-        return f"{TRADE_DATASTORAGE_SLOT}{self.slot}"
+        return self.trade_storage_slot_key
 
     def on_package(self, cmd: str, args: dict) -> None:
         if cmd == "Connected":
+            self.received_items_state = None
+            self.available_nodes_cache = None
+            self.own_slots = frozenset([self.slot]).union(
+                slot for slot, slot_info in self.slot_info.items() if self.slot in slot_info.group_members
+            )
             # Set up the trade storage
+            self.trade_storage_team_key = f"{TRADE_DATASTORAGE_TEAM}{self.team}"
+            self.trade_storage_slot_key = f"{TRADE_DATASTORAGE_SLOT}{self.slot}"
             async_start(self.send_msgs([
                 { # We want to know about other clients' Set commands for locking
                     "cmd": "SetNotify",
@@ -651,19 +795,19 @@ class SC2Context(CommonContext):
                 }
             ]))
 
-            self.difficulty = args["slot_data"]["game_difficulty"]
-            self.game_speed = args["slot_data"].get("game_speed", GameSpeed.option_default)
-            self.disable_forced_camera = args["slot_data"].get("disable_forced_camera", DisableForcedCamera.default)
-            self.skip_cutscenes = args["slot_data"].get("skip_cutscenes", SkipCutscenes.default)
-            self.all_in_choice = args["slot_data"]["all_in_map"]
-            self.slot_data_version = args["slot_data"].get("version", 2)
+            slot_data = args["slot_data"]
+            self.difficulty = slot_data["game_difficulty"]
+            for attribute, key, default in _SLOT_DATA_FIELDS:
+                setattr(self, attribute, slot_data.get(key, default))
+            self.all_in_choice = slot_data["all_in_map"]
+            self.slot_data_version = slot_data.get("version", 2)
 
             if self.slot_data_version < 4:
                 # Maintaining backwards compatibility with older slot data
                 slot_req_table: dict = args["slot_data"]["mission_req"]
 
                 first_item = list(slot_req_table.keys())[0]
-                if first_item in [str(campaign.id) for campaign in SC2Campaign]:
+                if first_item in _CAMPAIGN_ID_STRINGS:
                     # Multi-campaign
                     mission_req_table = {}
                     for campaign_id in slot_req_table:
@@ -684,30 +828,30 @@ class SC2Context(CommonContext):
                 
             if self.slot_data_version >= 4:
                 self.custom_mission_order = [
-                    CampaignSlotData(
-                        **{field:value for field, value in campaign_data.items() if field not in ["layouts", "entry_rule"]},
-                        entry_rule = SubRuleRuleData.parse_from_dict(campaign_data["entry_rule"]),
-                        layouts = [
-                            LayoutSlotData(
-                                **{field:value for field, value in layout_data.items() if field not in ["missions", "entry_rule"]},
-                                entry_rule = SubRuleRuleData.parse_from_dict(layout_data["entry_rule"]),
-                                missions = [
-                                    [
-                                        MissionSlotData(
-                                            **{field:value for field, value in mission_data.items() if field != "entry_rule"},
-                                            entry_rule = SubRuleRuleData.parse_from_dict(mission_data["entry_rule"])
-                                        ) for mission_data in column
-                                    ] for column in layout_data["missions"]
-                                ]
-                            ) for layout_data in campaign_data["layouts"]
-                        ]
-                    ) for campaign_data in args["slot_data"]["custom_mission_order"]
+                    CampaignSlotData.parse_from_dict(campaign_data)
+                    for campaign_data in args["slot_data"]["custom_mission_order"]
                 ]
-            self.mission_id_to_entry_rules = {
-                mission.mission_id: MissionEntryRules(mission.entry_rule, layout.entry_rule, campaign.entry_rule)
-                for campaign in self.custom_mission_order for layout in campaign.layouts
-                for column in layout.missions for mission in column
-            }
+            # The mission order is walked once here; build_location_to_mission_mapping reuses these keys
+            self.mission_id_to_entry_rules = {}
+            self.total_mission_count = 0
+            self.mission_order_topology = []
+            for campaign_idx, campaign in enumerate(self.custom_mission_order):
+                layout_nodes: typing.List[MissionOrderLayoutNode] = []
+                for layout_idx, layout in enumerate(campaign.layouts):
+                    # Every mission in a layout shares the same layout and campaign rules
+                    layout_rule, campaign_rule = layout.entry_rule, campaign.entry_rule
+                    mission_nodes: typing.List[typing.Tuple[int, SubRuleRuleData]] = []
+                    for column in layout.missions:
+                        self.total_mission_count += len(column)
+                        for mission in column:
+                            self.mission_id_to_entry_rules[mission.mission_id] = MissionEntryRules(
+                                mission.entry_rule, layout_rule, campaign_rule
+                            )
+                            # Empty mission slots are never available
+                            if mission.mission_id != -1:
+                                mission_nodes.append((mission.mission_id, mission.entry_rule))
+                    layout_nodes.append((layout_idx, layout_rule, mission_nodes))
+                self.mission_order_topology.append((campaign_idx, campaign.entry_rule, layout_nodes))
                 
             self.mission_order = args["slot_data"].get("mission_order", MissionOrder.option_vanilla)
             if self.slot_data_version < 4:
@@ -736,28 +880,6 @@ class SC2Context(CommonContext):
                 self.slot_data_version,
                 args["slot_data"].get("player_color_nova", ColorChoice.option_dark_grey)
             )
-            self.generic_upgrade_missions = args["slot_data"].get("generic_upgrade_missions", GenericUpgradeMissions.default)
-            self.generic_upgrade_items = args["slot_data"].get("generic_upgrade_items", GenericUpgradeItems.option_individual_items)
-            self.generic_upgrade_research = args["slot_data"].get("generic_upgrade_research", GenericUpgradeResearch.option_vanilla)
-            self.kerrigan_presence = args["slot_data"].get("kerrigan_presence", KerriganPresence.option_vanilla)
-            self.kerrigan_primal_status = args["slot_data"].get("kerrigan_primal_status", KerriganPrimalStatus.option_vanilla)
-            self.kerrigan_levels_per_mission_completed = args["slot_data"].get("kerrigan_levels_per_mission_completed", 0)
-            self.kerrigan_levels_per_mission_completed_cap = args["slot_data"].get("kerrigan_levels_per_mission_completed_cap", -1)
-            self.kerrigan_total_level_cap = args["slot_data"].get("kerrigan_total_level_cap", -1)
-            self.enable_morphling = args["slot_data"].get("enable_morphling", EnableMorphling.option_false)
-            self.grant_story_tech = args["slot_data"].get("grant_story_tech", GrantStoryTech.option_false)
-            self.grant_story_levels = args["slot_data"].get("grant_story_levels", GrantStoryLevels.option_additive)
-            self.required_tactics = args["slot_data"].get("required_tactics", RequiredTactics.option_standard)
-            self.take_over_ai_allies = args["slot_data"].get("take_over_ai_allies", TakeOverAIAllies.option_false)
-            self.spear_of_adun_presence = args["slot_data"].get("spear_of_adun_presence", SpearOfAdunPresence.option_not_present)
-            self.spear_of_adun_present_in_no_build = args["slot_data"].get("spear_of_adun_present_in_no_build", SpearOfAdunPresentInNoBuild.option_false)
-            self.spear_of_adun_autonomously_cast_ability_presence = args["slot_data"].get("spear_of_adun_autonomously_cast_ability_presence", SpearOfAdunAutonomouslyCastAbilityPresence.option_not_present)
-            self.spear_of_adun_autonomously_cast_present_in_no_build = args["slot_data"].get("spear_of_adun_autonomously_cast_present_in_no_build", SpearOfAdunAutonomouslyCastPresentInNoBuild.option_false)
-            self.minerals_per_item = args["slot_data"].get("minerals_per_item", 15)
-            self.vespene_per_item = args["slot_data"].get("vespene_per_item", 15)
-            self.starting_supply_per_item = args["slot_data"].get("starting_supply_per_item", 2)
-            self.nova_covert_ops_only = args["slot_data"].get("nova_covert_ops_only", False)
-            self.trade_enabled = args["slot_data"].get("enable_void_trade", EnableVoidTrade.option_false)
 
             if self.required_tactics == RequiredTactics.option_no_logic:
                 # Locking Grant Story Tech/Levels if no logic
@@ -785,13 +907,7 @@ class SC2Context(CommonContext):
                 with open(get_metadata_file(), "r") as f:
                     current_ver = f.read()
                     sc2_logger.debug(f"Current version: {current_ver}")
-                if is_mod_update_available(DATA_REPO_OWNER, DATA_REPO_NAME, DATA_API_VERSION, current_ver):
-                    (
-                        ColouredMessage().coloured("NOTICE: Update for required files found. ", colour="red")
-                        ("Run ").coloured("/download_data", colour="slateblue")
-                        (" to install.")
-                    ).send(self)
-                    self.data_out_of_date = True
+                async_start(self.check_for_data_update(current_ver), name="check for data update")
             elif maps_present:
                 (
                     ColouredMessage()
@@ -802,28 +918,74 @@ class SC2Context(CommonContext):
                 self.data_out_of_date = True
             
             ColouredMessage("[b]Check the Launcher tab to start playing.[/b]", keep_markup=True).send(self)
+            self.refresh_mission_table()
         
+        elif cmd == "RoomUpdate":
+            if "checked_locations" in args:
+                self.refresh_mission_table()
+
+        elif cmd == "ReceivedItems":
+            # Items from index 0 replace the whole list, anything else was appended at args["index"]
+            if args["index"] == 0:
+                self.received_item_ids = set()
+                self.received_items_state = None
+                self.available_nodes_cache = None
+            self.received_item_ids.update(network_item.item for network_item in self.items_received[args["index"]:])
+
         elif cmd == "SetReply":
             # Currently can only be Void Trade reply
-            self.trade_latest_reply = args
-            self.trade_reply_event.set()
+            reply_future = self.trade_pending_replies.pop(args.get("uuid"), None)
+            if reply_future is not None and not reply_future.done():
+                reply_future.set_result(args)
+
+    async def check_for_data_update(self, current_ver: str) -> None:
+        # The GitHub request blocks, so it runs on the loop's default executor instead of stalling the client
+        update_available = await asyncio.get_running_loop().run_in_executor(
+            None, is_mod_update_available, DATA_REPO_OWNER, DATA_REPO_NAME, DATA_API_VERSION, current_ver
+        )
+        if update_available:
+            (
+                ColouredMessage().coloured("NOTICE: Update for required files found. ", colour="red")
+                ("Run ").coloured("/download_data", colour="slateblue")
+                (" to install.")
+            ).send(self)
+            self.data_out_of_date = True
+            self.refresh_mission_table()
 
     @staticmethod
     def parse_mission_info(mission_info: dict[str, typing.Any]) -> MissionInfo:
         if mission_info.get("id") is not None:
-            mission_info["mission"] = lookup_id_to_mission[mission_info["id"]]
+            mission = lookup_id_to_mission[mission_info["id"]]
         elif isinstance(mission_info["mission"], int):
-            mission_info["mission"] = lookup_id_to_mission[mission_info["mission"]]
+            mission = lookup_id_to_mission[mission_info["mission"]]
+        else:
+            mission = mission_info["mission"]
 
+        get = mission_info.get
+        defaults = MissionInfo._field_defaults
         return MissionInfo(
-            **{field: value for field, value in mission_info.items() if field in MissionInfo._fields}
+            mission,
+            mission_info["required_world"],
+            mission_info["category"],
+            get("number", defaults["number"]),
+            get("completion_critical", defaults["completion_critical"]),
+            get("or_requirements", defaults["or_requirements"]),
+            get("ui_vertical_padding", defaults["ui_vertical_padding"]),
         )
     
     @staticmethod
     def parse_mission_req_table(mission_req_table: typing.Dict[SC2Campaign, typing.Dict[typing.Any, MissionInfo]]) -> typing.List[CampaignSlotData]:
         campaigns: typing.List[typing.Tuple[int, CampaignSlotData]] = []
         rolling_rule_id = 0
+        # Connections refer to missions by campaign and 1-based position, so index both up front
+        campaign_missions: typing.Dict[SC2Campaign, typing.List[MissionInfo]] = {
+            campaign: list(campaign_data.values()) for campaign, campaign_data in mission_req_table.items()
+        }
+        campaign_missions_by_id: typing.Dict[int, typing.List[MissionInfo]] = {}
+        for campaign, missions_in_campaign in campaign_missions.items():
+            campaign_missions_by_id.setdefault(campaign.id, missions_in_campaign)
         for (campaign, campaign_data) in mission_req_table.items():
+            campaign_mission_ids = [mission.mission.id for mission in campaign_missions[campaign]]
             if campaign.campaign_name == "Global":
                 campaign_name = ""
             else:
@@ -837,26 +999,18 @@ class SC2Context(CommonContext):
                 sub_rules: typing.List[CountMissionsRuleData] = []
                 if mission.number:
                     amount = mission.number
-                    missions = [
-                        mission.mission.id
-                        for mission in mission_req_table[campaign].values()
-                    ]
-                    sub_rules.append(CountMissionsRuleData(missions, amount, [campaign_name]))
+                    sub_rules.append(CountMissionsRuleData(campaign_mission_ids, amount, [campaign_name]))
                 prev_missions: typing.List[int] = []
                 if len(mission.required_world) > 0:
                     missions: typing.List[int] = []
                     for connection in mission.required_world:
                         if isinstance(connection, dict):
-                            required_campaign = {}
-                            for camp, camp_data in mission_req_table.items():
-                                if camp.id == connection["campaign"]:
-                                    required_campaign = camp_data
-                                    break
+                            required_campaign = campaign_missions_by_id.get(connection["campaign"], [])
                             required_mission_id = connection["connect_to"]
                         else:
-                            required_campaign = mission_req_table[connection.campaign]
+                            required_campaign = campaign_missions[connection.campaign]
                             required_mission_id = connection.connect_to
-                        required_mission = list(required_campaign.values())[required_mission_id - 1]
+                        required_mission = required_campaign[required_mission_id - 1]
                         missions.append(required_mission.mission.id)
                         if required_mission.category == mission.category:
                             prev_missions.append(required_mission.mission.id)
@@ -882,17 +1036,17 @@ class SC2Context(CommonContext):
 
     def on_print_json(self, args: dict) -> None:
         # goes to this world
-        if "receiving" in args and self.slot_concerns_self(args["receiving"]):
+        if "receiving" in args and args["receiving"] in self.own_slots:
             relevant = True
         # found in this world
-        elif "item" in args and self.slot_concerns_self(args["item"].player):
+        elif "item" in args and args["item"].player in self.own_slots:
             relevant = True
         # not related
         else:
             relevant = False
 
         if relevant:
-            self.announcements.put(self.raw_text_parser(copy.deepcopy(args["data"])))
+            self.announcements.append(self.raw_text_parser(_json_clone(args["data"])))
 
         super(SC2Context, self).on_print_json(args)
 
@@ -925,37 +1079,42 @@ class SC2Context(CommonContext):
 
     def build_location_to_mission_mapping(self) -> None:
         mission_id_to_location_ids: typing.Dict[int, typing.Set[int]] = {
-            mission.mission_id: set()
-            for campaign in self.custom_mission_order for layout in campaign.layouts
-            for column in layout.missions for mission in column
+            mission_id: set() for mission_id in self.mission_id_to_entry_rules
         }
 
         for loc in self.server_locations:
-            offset = SC2WOL_LOC_ID_OFFSET if loc < SC2HOTS_LOC_ID_OFFSET \
-                else (SC2HOTS_LOC_ID_OFFSET - SC2Mission.ALL_IN.id * VICTORY_MODULO)
+            offset = SC2WOL_LOC_ID_OFFSET if loc < SC2HOTS_LOC_ID_OFFSET else _HOTS_LOCATION_OFFSET
             mission_id, objective = divmod(loc - offset, VICTORY_MODULO)
             mission_id_to_location_ids[mission_id].add(objective)
         self.mission_id_to_location_ids = {mission_id: sorted(objectives) for mission_id, objectives in
                                            mission_id_to_location_ids.items()}
+        # Full location ids never change after connecting, so they are resolved once here
+        self.mission_id_to_location_id_list = {
+            mission_id: [get_location_id(mission_id, objective) for objective in objectives]
+            for mission_id, objectives in self.mission_id_to_location_ids.items()
+        }
+        self.mission_victory_location_ids = frozenset(
+            get_location_id(mission_id, 0) for mission_id in self.mission_id_to_location_ids
+        )
 
-    def locations_for_mission(self, mission: SC2Mission) -> typing.Iterable[int]:
-        mission_id: int = mission.id
-        objectives = self.mission_id_to_location_ids[mission_id]
-        for objective in objectives:
-            yield get_location_id(mission_id, objective)
+    def locations_for_mission(self, mission: SC2Mission) -> typing.List[int]:
+        return self.mission_id_to_location_id_list[mission.id]
     
-    def locations_for_mission_id(self, mission_id: int) -> typing.Iterable[int]:
-        objectives = self.mission_id_to_location_ids[mission_id]
-        for objective in objectives:
-            yield get_location_id(mission_id, objective)
-
-    def uncollected_locations_in_mission(self, mission: SC2Mission) -> typing.Iterable[int]:
-        for location_id in self.locations_for_mission(mission):
-            if location_id in self.missing_locations:
-                yield location_id
+    def locations_for_mission_id(self, mission_id: int) -> typing.List[int]:
+        return self.mission_id_to_location_id_list[mission_id]
+
+    def uncollected_locations_in_mission(self, mission: SC2Mission) -> typing.List[int]:
+        missing_locations = self.missing_locations
+        return [
+            location_id for location_id in self.mission_id_to_location_id_list[mission.id]
+            if location_id in missing_locations
+        ]
 
     def is_mission_completed(self, mission_id: int) -> bool:
         return get_location_id(mission_id, 0) in self.checked_locations
+
+    def completed_mission_count(self) -> int:
+        return len(self.mission_victory_location_ids.intersection(self.checked_locations))
     
         
     async def trade_acquire_storage(self, keep_trying: bool = False) -> typing.Optional[dict]:
@@ -969,8 +1128,11 @@ class SC2Context(CommonContext):
         until successful. Otherwise it will return `None` if it fails to
         acquire the lock.
         """
+        from uuid import uuid4
+        time_ns = time.time_ns
+
         while not self.exit_event.is_set() and self.last_bot and self.last_bot.game_running:
-            lock = int(time.time_ns() / 1000000)
+            lock = time_ns() // 1_000_000
 
             # Make sure we're not past the waiting limit
             # SC2 needs to be notified within 10 minutes (training time of the dummy units)
@@ -982,7 +1144,10 @@ class SC2Context(CommonContext):
             elif keep_trying:
                 self.trade_lock_start = self.last_bot.time
 
-            message_uuid = str(uuid.uuid4())
+            message_uuid = str(uuid4())
+            # Registered before sending, so a reply that arrives immediately is still delivered
+            reply_future: asyncio.Future = asyncio.get_running_loop().create_future()
+            self.trade_pending_replies[message_uuid] = reply_future
             await self.send_msgs([{
                 "cmd": "Set",
                 "key": self.trade_storage_team(),
@@ -992,22 +1157,14 @@ class SC2Context(CommonContext):
                 "uuid": message_uuid,
             }])
 
-            self.trade_reply_event.clear()
             try:
-                await asyncio.wait_for(self.trade_reply_event.wait(), 5)
+                reply = await asyncio.wait_for(reply_future, 5)
             except asyncio.TimeoutError:
                 if not keep_trying:
                     return None
                 continue
-
-            reply = copy.deepcopy(self.trade_latest_reply)
-
-            # Make sure the most recently received update was triggered by our lock attempt
-            if reply.get("uuid", None) != message_uuid:
-                if not keep_trying:
-                    return None
-                await asyncio.sleep(TRADE_LOCK_TIME)
-                continue
+            finally:
+                self.trade_pending_replies.pop(message_uuid, None)
 
             # Make sure the current value of the lock is what we set it to
             # (I think this should theoretically never run)
@@ -1072,34 +1229,38 @@ class SC2Context(CommonContext):
         if available < amount:
             refunds = amount - available
             amount = available
-        if available == 0:
-            # random.sample crashes if counts is an empty list
-            units = []
+        if amount == available:
+            # Everything is taken, so there is nothing to sample
+            # This also covers the empty storage case, where random.sample crashes on an empty counts list
+            units = [
+                unit_and_slot
+                for unit_and_slot, count in zip(available_units, available_counts)
+                for _ in range(count)
+            ]
         else:
             units = random.sample(available_units, amount, counts = available_counts)
 
         # Build response data
-        unit_counts: typing.Dict[str, int] = {}
-        slots_to_update: typing.Dict[str, typing.Dict[str, int]] = {}
+        unit_counts: typing.Counter[str] = collections.Counter(unit for (unit, _) in units)
+        picks_by_slot: typing.Dict[str, typing.Counter[str]] = {}
         for (unit, slot) in units:
-            unit_counts[unit] = unit_counts.get(unit, 0) + 1
-            if slot not in slots_to_update:
-                slots_to_update[slot] = copy.deepcopy(reply["value"][slot])
-            slots_to_update[slot][unit] -= 1
-            # Clean up units that were removed completely
-            if slots_to_update[slot][unit] == 0:
-                slots_to_update[slot].pop(unit)
+            picks_by_slot.setdefault(slot, collections.Counter())[unit] += 1
+        slots_to_update: typing.Dict[str, typing.Dict[str, int]] = {}
+        for slot, picks in picks_by_slot.items():
+            # Copied key by key, since Counter subtraction would also drop unpicked units stored with a count of 0
+            remaining_units = dict(reply["value"][slot])
+            for unit, count in picks.items():
+                remaining_units[unit] -= count
+                # Clean up units that were removed completely
+                if remaining_units[unit] == 0:
+                    remaining_units.pop(unit)
+            slots_to_update[slot] = remaining_units
 
         await self.send_msgs([
-            {   # Update server storage
-                "cmd": "Set",
-                "key": self.trade_storage_team(),
-                "operations": [{ "operation": "update", "value": slots_to_update }]
-            },
-            {   # Release the lock
+            {   # Update server storage and release the lock
                 "cmd": "Set",
                 "key": self.trade_storage_team(),
-                "operations": [{ "operation": "update", "value": { TRADE_DATASTORAGE_LOCK: 0 } }]
+                "operations": [{ "operation": "update", "value": { **slots_to_update, TRADE_DATASTORAGE_LOCK: 0 } }]
             }
         ])
 
@@ -1118,20 +1279,15 @@ class SC2Context(CommonContext):
             return None
         
         # Update the storage with the new units
-        data: typing.Dict[str, int] = copy.deepcopy(reply["value"].get(self.trade_storage_slot(), {}))
+        data: typing.Dict[str, int] = dict(reply["value"].get(self.trade_storage_slot(), {}))
         for unit in units:
             data[unit] = data.get(unit, 0) + 1
         
         await self.send_msgs([
-            {   # Send the updated data
-                "cmd": "Set",
-                "key": self.trade_storage_team(),
-                "operations": [{ "operation": "update", "value": { self.trade_storage_slot(): data } }]
-            },
-            {   # Release the lock
+            {   # Send the updated data and release the lock
                 "cmd": "Set",
                 "key": self.trade_storage_team(),
-                "operations": [{ "operation": "update", "value": { TRADE_DATASTORAGE_LOCK: 0 } }]
+                "operations": [{ "operation": "update", "value": { self.trade_storage_slot(): data, TRADE_DATASTORAGE_LOCK: 0 } }]
             }
         ])
         
@@ -1145,6 +1301,7 @@ class CompatItemHolder(typing.NamedTuple):
 
 
 async def main():
+    import multiprocessing
     multiprocessing.freeze_support()
     parser = get_base_parser()
     parser.add_argument('--name', default=None, help="Slot Name to connect as.")
@@ -1190,145 +1347,259 @@ def compat_item_to_network_items(compat_item: CompatItemHolder) -> typing.List[N
     return compat_item.quantity * [network_item]
 
 
-def calculate_items(ctx: SC2Context) -> typing.Dict[SC2Race, typing.List[int]]:
-    items = ctx.items_received.copy()
-    # Items unlocked in earlier generator versions by default (Prophecy defaults, war council, rebalances)
-    if ctx.slot_data_version < 3:
-        for compat_item in API2_TO_API3_COMPAT_ITEMS:
-            items.extend(compat_item_to_network_items(compat_item))
-    if ctx.slot_data_version < 4:
-        for compat_item in API3_TO_API4_COMPAT_ITEMS:
-            items.extend(compat_item_to_network_items(compat_item))
+# get_full_item_list() is already a plain table lookup; the compat items themselves never change, so expand them once
+_API2_TO_API3_COMPAT_NETWORK_ITEMS: typing.List[NetworkItem] = [
+    network_item for compat_item in API2_TO_API3_COMPAT_ITEMS
+    for network_item in compat_item_to_network_items(compat_item)
+]
+_API3_TO_API4_COMPAT_NETWORK_ITEMS: typing.List[NetworkItem] = [
+    network_item for compat_item in API3_TO_API4_COMPAT_ITEMS
+    for network_item in compat_item_to_network_items(compat_item)
+]
+
+
+class _ItemOperation(enum.IntEnum):
+    """How calculate_items() applies one received item to its race's flag word"""
+    SKIP = 0
+    OR = enum.auto()
+    ADD = enum.auto()
+    ADD_SHIELDS_FROM_GROUND = enum.auto()
+    ADD_SHIELDS_FROM_AIR = enum.auto()
+    ADD_REGENERATIVE_BIO_STEEL = enum.auto()
+    ORBITAL_COMMAND = enum.auto()
+    STARTING_MINERALS = enum.auto()
+    STARTING_VESPENE = enum.auto()
+    STARTING_SUPPLY = enum.auto()
+
+
+def _build_item_operations() -> typing.Dict[int, typing.Tuple[_ItemOperation, SC2Race, int, int]]:
+    """Resolves each item id to (operation, race, flag word, value) once, from its item data"""
+    special_sum_items = {
+        item_names.PROGRESSIVE_ORBITAL_COMMAND: _ItemOperation.ORBITAL_COMMAND,
+        item_names.STARTING_MINERALS: _ItemOperation.STARTING_MINERALS,
+        item_names.STARTING_VESPENE: _ItemOperation.STARTING_VESPENE,
+        item_names.STARTING_SUPPLY: _ItemOperation.STARTING_SUPPLY,
+    }
+    operations: typing.Dict[int, typing.Tuple[_ItemOperation, SC2Race, int, int]] = {}
+    for item_id, item_data in lookup_id_to_item_data.items():
+        name = lookup_id_to_name[item_id]
+        flag_word = item_data.type.flag_word
+        if flag_word < 0:
+            operation, value = _ItemOperation.SKIP, 0
+        # exists exactly once
+        elif item_data.quantity == 1:
+            operation, value = _ItemOperation.OR, 1 << item_data.number
+        # exists multiple times
+        elif item_data.quantity > 1:
+            if name == item_names.PROGRESSIVE_REGENERATIVE_BIO_STEEL:
+                operation, value = _ItemOperation.ADD_REGENERATIVE_BIO_STEEL, 1 << item_data.number
+            elif item_data.number >= 0:
+                operation, value = _ItemOperation.ADD, 1 << item_data.number
+            else:
+                # Generic upgrades apply only to Weapon / Armor upgrades; adding each member is adding their sum
+                value = sum(1 << bundled_number for bundled_number in get_bundle_upgrade_member_numbers(name))
+                if name == item_names.PROGRESSIVE_PROTOSS_GROUND_UPGRADE:
+                    operation = _ItemOperation.ADD_SHIELDS_FROM_GROUND
+                elif name == item_names.PROGRESSIVE_PROTOSS_AIR_UPGRADE:
+                    operation = _ItemOperation.ADD_SHIELDS_FROM_AIR
+                else:
+                    operation = _ItemOperation.ADD
+        # sum
+        else:
+            operation = special_sum_items.get(name, _ItemOperation.ADD)
+            value = item_data.number
+        operations[item_id] = (operation, item_data.race, flag_word, value)
+    return operations
 
-    # API < 4 Orbital Command Count (Deprecated item)
-    orbital_command_count: int = 0
 
-    network_item: NetworkItem
-    accumulators: typing.Dict[SC2Race, typing.List[int]] = {
-        race: [0 for element in item_type_enum_class if element.flag_word >= 0]
-        for race, item_type_enum_class in race_to_item_type.items()
-    }
+# One zeroed flag word per item type of each race
+_ACCUMULATOR_TEMPLATE: typing.Dict[SC2Race, typing.List[int]] = {
+    race: [0 for element in item_type_enum_class if element.flag_word >= 0]
+    for race, item_type_enum_class in race_to_item_type.items()
+}
+# Zerg flag words sent with ?GiveZergTech; Kerrigan's level and primal form are sent as their own arguments
+_ZERG_TECH_FLAG_WORDS: typing.Callable[[typing.List[int]], typing.Tuple[int, ...]] = operator.itemgetter(*(
+    flag_word for flag_word in range(len(_ACCUMULATOR_TEMPLATE[SC2Race.ZERG]))
+    if flag_word not in (ZergItemType.Level.flag_word, ZergItemType.Primal_Form.flag_word)
+))
+
+
+def _item_flag(item_name: str) -> typing.Tuple[SC2Race, int, int]:
+    """(race, flag word, bit) an item sets in calculate_items() accumulators"""
+    item_data = get_full_item_list()[item_name]
+    return item_data.race, item_data.type.flag_word, 1 << item_data.number
+
+
+_PROTOSS_SHIELDS_FLAG = _item_flag(item_names.PROGRESSIVE_PROTOSS_SHIELDS)
+_COMMAND_CENTER_SCANNER_SWEEP_FLAG = _item_flag(item_names.COMMAND_CENTER_SCANNER_SWEEP)
+_COMMAND_CENTER_MULE_FLAG = _item_flag(item_names.COMMAND_CENTER_MULE)
+_PLANETARY_FORTRESS_ORBITAL_MODULE_FLAG = _item_flag(item_names.PLANETARY_FORTRESS_ORBITAL_MODULE)
+_ORBITAL_COMMAND_REPLACEMENT_IDS: typing.FrozenSet[int] = frozenset(
+    get_full_item_list()[item_name].code for item_name in (
+        item_names.COMMAND_CENTER_SCANNER_SWEEP,
+        item_names.COMMAND_CENTER_MULE,
+        item_names.COMMAND_CENTER_EXTRA_SUPPLIES,
+        item_names.PLANETARY_FORTRESS_ORBITAL_MODULE,
+    )
+)
+
 
+@dataclasses.dataclass
+class _ReceivedItemsState:
+    """Item-derived part of calculate_items(), carried between calls so only newly received items are applied"""
+    cache_key: typing.Tuple[int, int, int, int]
+    accumulators: typing.Dict[SC2Race, typing.List[int]]
+    items_applied: int = 0
     # Protoss Shield grouped item specific logic
     shields_from_ground_upgrade: int = 0
     shields_from_air_upgrade: int = 0
+    # API < 4 Orbital Command Count (Deprecated item)
+    orbital_command_count: int = 0
+    orbital_command_replacement_received: bool = False
 
-    item_list = get_full_item_list()
-    for network_item in items:
-        name: str = lookup_id_to_name[network_item.item]
-        item_data: ItemData = item_list[name]
-
-        if item_data.type.flag_word < 0:
-            continue
 
-        # exists exactly once
-        if item_data.quantity == 1:
-            accumulators[item_data.race][item_data.type.flag_word] |= 1 << item_data.number
+def _compat_network_items(ctx: SC2Context) -> typing.List[NetworkItem]:
+    """Items unlocked in earlier generator versions by default (Prophecy defaults, war council, rebalances)"""
+    items: typing.List[NetworkItem] = []
+    if ctx.slot_data_version < 3:
+        items.extend(_API2_TO_API3_COMPAT_NETWORK_ITEMS)
+    if ctx.slot_data_version < 4:
+        items.extend(_API3_TO_API4_COMPAT_NETWORK_ITEMS)
+    return items
+
+
+def _apply_received_items(ctx: SC2Context, state: _ReceivedItemsState, new_items: typing.Iterable[NetworkItem]) -> None:
+    item_operations = _ITEM_OPERATIONS
+    # Enum member lookups go through the enum metaclass; bind the operations to locals for the loop
+    OR, ADD = _ItemOperation.OR, _ItemOperation.ADD
+    ADD_SHIELDS_FROM_GROUND = _ItemOperation.ADD_SHIELDS_FROM_GROUND
+    ADD_SHIELDS_FROM_AIR = _ItemOperation.ADD_SHIELDS_FROM_AIR
+    ADD_REGENERATIVE_BIO_STEEL = _ItemOperation.ADD_REGENERATIVE_BIO_STEEL
+    ORBITAL_COMMAND = _ItemOperation.ORBITAL_COMMAND
+    STARTING_MINERALS = _ItemOperation.STARTING_MINERALS
+    STARTING_VESPENE = _ItemOperation.STARTING_VESPENE
+    STARTING_SUPPLY = _ItemOperation.STARTING_SUPPLY
+    # Copies of the same item apply identically, so handle each distinct id once and scale by its count
+    item_counts = collections.Counter(network_item.item for network_item in new_items)
+    if not _ORBITAL_COMMAND_REPLACEMENT_IDS.isdisjoint(item_counts):
+        state.orbital_command_replacement_received = True
+    for item_id, count in item_counts.items():
+        operation, race, flag_word, value = item_operations[item_id]
+        flag_words = state.accumulators[race]
+        if operation == OR:
+            flag_words[flag_word] |= value
+        elif operation == ADD:
+            flag_words[flag_word] += value * count
+        elif operation == ADD_SHIELDS_FROM_GROUND:
+            state.shields_from_ground_upgrade += count
+            flag_words[flag_word] += value * count
+        elif operation == ADD_SHIELDS_FROM_AIR:
+            state.shields_from_air_upgrade += count
+            flag_words[flag_word] += value * count
+        elif operation == ADD_REGENERATIVE_BIO_STEEL:
+            for _ in range(count):
+                flag_words[flag_word] += value
+                # Regen bio-steel nerf with API3 - undo for older games
+                if ctx.slot_data_version < 3 and flag_words[flag_word] // value % 4 == 2:
+                    # Switch from level 2 to level 3 for compatibility
+                    flag_words[flag_word] += value
+        elif operation == ORBITAL_COMMAND:
+            state.orbital_command_count += count
+        elif operation == STARTING_MINERALS:
+            flag_words[flag_word] += ctx.minerals_per_item * count
+        elif operation == STARTING_VESPENE:
+            flag_words[flag_word] += ctx.vespene_per_item * count
+        elif operation == STARTING_SUPPLY:
+            flag_words[flag_word] += ctx.starting_supply_per_item * count
+
+
+def _update_received_items_state(ctx: SC2Context) -> _ReceivedItemsState:
+    """Brings ctx.received_items_state up to date with ctx.items_received, starting over if it no longer applies"""
+    state = ctx.received_items_state
+    cache_key = (ctx.slot_data_version, ctx.minerals_per_item, ctx.vespene_per_item, ctx.starting_supply_per_item)
+    if state is None or state.cache_key != cache_key or state.items_applied > len(ctx.items_received):
+        state = _ReceivedItemsState(cache_key, {
+            race: flag_words.copy() for race, flag_words in _ACCUMULATOR_TEMPLATE.items()
+        })
+        _apply_received_items(ctx, state, _compat_network_items(ctx))
+        ctx.received_items_state = state
+    if state.items_applied < len(ctx.items_received):
+        _apply_received_items(ctx, state, ctx.items_received[state.items_applied:])
+        state.items_applied = len(ctx.items_received)
+    return state
 
-        # exists multiple times
-        elif item_data.quantity > 1:
-            flaggroup = item_data.type.flag_word
 
-            # Generic upgrades apply only to Weapon / Armor upgrades
-            if item_data.number >= 0:
-                accumulators[item_data.race][flaggroup] += 1 << item_data.number
-            else:
-                if name == item_names.PROGRESSIVE_PROTOSS_GROUND_UPGRADE:
-                    shields_from_ground_upgrade += 1
-                if name == item_names.PROGRESSIVE_PROTOSS_AIR_UPGRADE:
-                    shields_from_air_upgrade += 1
-                for bundled_number in get_bundle_upgrade_member_numbers(name):
-                    accumulators[item_data.race][flaggroup] += 1 << bundled_number
-
-            # Regen bio-steel nerf with API3 - undo for older games
-            if ctx.slot_data_version < 3 and name == item_names.PROGRESSIVE_REGENERATIVE_BIO_STEEL:
-                current_level = (accumulators[item_data.race][flaggroup] >> item_data.number) % 4
-                if current_level == 2:
-                    # Switch from level 2 to level 3 for compatibility
-                    accumulators[item_data.race][flaggroup] += 1 << item_data.number
-        # sum
-        else:
-            if name == item_names.PROGRESSIVE_ORBITAL_COMMAND:
-                orbital_command_count += 1
-            elif name == item_names.STARTING_MINERALS:
-                accumulators[item_data.race][item_data.type.flag_word] += ctx.minerals_per_item
-            elif name == item_names.STARTING_VESPENE:
-                accumulators[item_data.race][item_data.type.flag_word] += ctx.vespene_per_item
-            elif name == item_names.STARTING_SUPPLY:
-                accumulators[item_data.race][item_data.type.flag_word] += ctx.starting_supply_per_item
-            else:
-                accumulators[item_data.race][item_data.type.flag_word] += item_data.number
+def calculate_items(ctx: SC2Context) -> typing.Dict[SC2Race, typing.List[int]]:
+    state = _update_received_items_state(ctx)
+    accumulators: typing.Dict[SC2Race, typing.List[int]] = {
+        race: flag_words.copy() for race, flag_words in state.accumulators.items()
+    }
+    shields_from_ground_upgrade = state.shields_from_ground_upgrade
+    shields_from_air_upgrade = state.shields_from_air_upgrade
+    orbital_command_count = state.orbital_command_count
 
     # Fix Shields from generic upgrades by unit class (Maximum of ground/air upgrades)
     if shields_from_ground_upgrade > 0 or shields_from_air_upgrade > 0:
         shield_upgrade_level = max(shields_from_ground_upgrade, shields_from_air_upgrade)
-        shield_upgrade_item = item_list[item_names.PROGRESSIVE_PROTOSS_SHIELDS]
-        for _ in range(0, shield_upgrade_level):
-            accumulators[shield_upgrade_item.race][shield_upgrade_item.type.flag_word] += 1 << shield_upgrade_item.number
+        race, flag_word, bit = _PROTOSS_SHIELDS_FLAG
+        accumulators[race][flag_word] += shield_upgrade_level * bit
 
     # Deprecated Orbital Command handling (Backwards compatibility):
     if orbital_command_count > 0:
-        orbital_command_replacement_items: typing.List[str] = [
-            item_names.COMMAND_CENTER_SCANNER_SWEEP,
-            item_names.COMMAND_CENTER_MULE,
-            item_names.COMMAND_CENTER_EXTRA_SUPPLIES,
-            item_names.PLANETARY_FORTRESS_ORBITAL_MODULE
-        ]
-        replacement_item_ids = [get_full_item_list()[item_name].code for item_name in orbital_command_replacement_items]
-        if sum(item_id in replacement_item_ids for item_id in items) > 0:
+        if state.orbital_command_replacement_received:
             logger.warning(inspect.cleandoc("""
                 Both old Orbital Command and its replacements are present in the world. Skipping compatibility handling.
             """))
         else:
             # None of replacement items are present
             # L1: MULE and Scanner Sweep
-            scanner_sweep_data = get_full_item_list()[item_names.COMMAND_CENTER_SCANNER_SWEEP]
-            mule_data = get_full_item_list()[item_names.COMMAND_CENTER_MULE]
-            accumulators[scanner_sweep_data.race][scanner_sweep_data.type.flag_word] += 1 << scanner_sweep_data.number
-            accumulators[mule_data.race][mule_data.type.flag_word] += 1 << mule_data.number
+            for race, flag_word, bit in (_COMMAND_CENTER_SCANNER_SWEEP_FLAG, _COMMAND_CENTER_MULE_FLAG):
+                accumulators[race][flag_word] += bit
             if orbital_command_count >= 2:
                 # L2 MULE and Scanner Sweep usable even in Planetary Fortress Mode
-                planetary_orbital_module_data = get_full_item_list()[item_names.PLANETARY_FORTRESS_ORBITAL_MODULE]
-                accumulators[planetary_orbital_module_data.race][planetary_orbital_module_data.type.flag_word] += \
-                    1 << planetary_orbital_module_data.number
+                race, flag_word, bit = _PLANETARY_FORTRESS_ORBITAL_MODULE_FLAG
+                accumulators[race][flag_word] += bit
 
     # Upgrades from completed missions
     if ctx.generic_upgrade_missions > 0:
-        total_missions = sum(len(column) for campaign in ctx.custom_mission_order for layout in campaign.layouts for column in layout.missions)
-        num_missions = int((ctx.generic_upgrade_missions / 100) * total_missions)
-        completed = len([mission_id for mission_id in ctx.mission_id_to_location_ids if ctx.is_mission_completed(mission_id)])
+        num_missions = int((ctx.generic_upgrade_missions / 100) * ctx.total_mission_count)
+        completed = ctx.completed_mission_count()
         upgrade_count = min(completed // num_missions, WEAPON_ARMOR_UPGRADE_MAX_LEVEL) if num_missions > 0 else WEAPON_ARMOR_UPGRADE_MAX_LEVEL
 
         # Equivalent to "Progressive Weapon/Armor Upgrade" item
-        global_upgrades: typing.Set[str] = upgrade_included_names[GenericUpgradeItems.option_bundle_all]
-        for global_upgrade in global_upgrades:
-            race = get_full_item_list()[global_upgrade].race
-            upgrade_flaggroup = race_to_item_type[race]["Upgrade"].flag_word
-            for bundled_number in get_bundle_upgrade_member_numbers(global_upgrade):
-                accumulators[race][upgrade_flaggroup] += upgrade_count << bundled_number
+        for race, upgrade_flaggroup, bundled_bits in _GLOBAL_UPGRADE_BITS:
+            accumulators[race][upgrade_flaggroup] += upgrade_count * bundled_bits
 
     return accumulators
 
 
-def get_bundle_upgrade_member_numbers(bundled_item: str) -> typing.List[int]:
+@functools.lru_cache(maxsize=None)
+def get_bundle_upgrade_member_numbers(bundled_item: str) -> typing.Tuple[int, ...]:
     upgrade_elements: typing.List[str] = upgrade_bundles[bundled_item]
     if bundled_item in (item_names.PROGRESSIVE_PROTOSS_GROUND_UPGRADE, item_names.PROGRESSIVE_PROTOSS_AIR_UPGRADE):
         # Shields are handled as a maximum of those two
         upgrade_elements = [item_name for item_name in upgrade_elements if item_name != item_names.PROGRESSIVE_PROTOSS_SHIELDS]
-    return [get_full_item_list()[item_name].number for item_name in upgrade_elements]
+    item_list = get_full_item_list()
+    return tuple(item_list[item_name].number for item_name in upgrade_elements)
 
 
-def calc_difficulty(difficulty: int):
-    if difficulty == 0:
-        return 'C'
-    elif difficulty == 1:
-        return 'N'
-    elif difficulty == 2:
-        return 'H'
-    elif difficulty == 3:
-        return 'B'
+_ITEM_OPERATIONS: typing.Dict[int, typing.Tuple[_ItemOperation, SC2Race, int, int]] = _build_item_operations()
+# (race, upgrade flag word, summed member bits) of each bundle granted by mission-based generic upgrades
+_GLOBAL_UPGRADE_BITS: typing.List[typing.Tuple[SC2Race, int, int]] = [
+    (
+        get_full_item_list()[global_upgrade].race,
+        race_to_item_type[get_full_item_list()[global_upgrade].race]["Upgrade"].flag_word,
+        sum(1 << bundled_number for bundled_number in get_bundle_upgrade_member_numbers(global_upgrade)),
+    )
+    for global_upgrade in upgrade_included_names[GenericUpgradeItems.option_bundle_all]
+]
+
+
+_DIFFICULTY_CODES: typing.Dict[int, str] = {0: 'C', 1: 'N', 2: 'H', 3: 'B'}
 
-    return 'X'
+
+def calc_difficulty(difficulty: int):
+    return _DIFFICULTY_CODES.get(difficulty, 'X')
 
 
 def get_kerrigan_level(ctx: SC2Context, items: typing.Dict[SC2Race, typing.List[int]], missions_beaten: int) -> int:
@@ -1402,6 +1673,10 @@ def caclulate_soa_options(ctx: SC2Context) -> int:
 
     return result
 
+
+_KERRIGAN_PRIMAL_FORM_ID: int = get_full_item_list()[item_names.KERRIGAN_PRIMAL_FORM].code
+
+
 def kerrigan_primal(ctx: SC2Context, kerrigan_level: int) -> bool:
     if ctx.kerrigan_primal_status == KerriganPrimalStatus.option_always_zerg:
         return True
@@ -1411,33 +1686,38 @@ def kerrigan_primal(ctx: SC2Context, kerrigan_level: int) -> bool:
         return kerrigan_level >= 35
     elif ctx.kerrigan_primal_status == KerriganPrimalStatus.option_half_completion:
         total_missions = len(ctx.mission_id_to_location_ids)
-        completed = sum(ctx.is_mission_completed(mission_id)
-                         for mission_id in ctx.mission_id_to_location_ids)
+        completed = ctx.completed_mission_count()
         return completed >= (total_missions / 2)
     elif ctx.kerrigan_primal_status == KerriganPrimalStatus.option_item:
-        codes = [item.item for item in ctx.items_received]
-        return get_full_item_list()[item_names.KERRIGAN_PRIMAL_FORM].code in codes
+        return _KERRIGAN_PRIMAL_FORM_ID in ctx.received_item_ids
     return False
 
 
+# Map variant sent to the game for race-swapped missions, checked in order
+_RACESWAP_VARIANTS: typing.Tuple[typing.Tuple[MissionFlag, int], ...] = (
+    (MissionFlag.Terran, 1),
+    (MissionFlag.Zerg, 2),
+    (MissionFlag.Protoss, 3),
+)
+
+
 def get_mission_variant(mission_id: int) -> int:
     mission_flags = lookup_id_to_mission[mission_id].flags
     if MissionFlag.RaceSwap not in mission_flags:
         return 0
-    if MissionFlag.Terran in mission_flags:
-        return 1
-    elif MissionFlag.Zerg in mission_flags:
-        return 2
-    elif MissionFlag.Protoss in mission_flags:
-        return 3
-    return 0
+    return next((variant for race_flag, variant in _RACESWAP_VARIANTS if race_flag in mission_flags), 0)
 
 
 async def starcraft_launch(ctx: SC2Context, mission_id: int):
+    from worlds._sc2common.bot.data import Race
+    from worlds._sc2common.bot.main import _host_game
+    from worlds._sc2common.bot.player import Bot
+
     sc2_logger.info(f"Launching {lookup_id_to_mission[mission_id].mission_name}. If game does not launch check log file for errors.")
 
     with DllDirectory(None):
-        run_game(
+        # Awaiting the game coroutine directly keeps the bot on the client's own event loop
+        await _host_game(
             bot.maps.get(lookup_id_to_mission[mission_id].map_file),
             [Bot(Race.Terran, ArchipelagoBot(ctx, mission_id), name="Archipelago", fullscreen=not SC2World.settings.game_windowed_mode)],
             realtime=True,
@@ -1456,7 +1736,8 @@ class ArchipelagoBot(bot.bot_ai.BotAI):
         'can_read_game',
         'last_received_update',
         'last_trade_cargo',
-        'last_supply_used'
+        'last_supply_used',
+        'last_tech_messages'
     ]
     ctx: SC2Context
 
@@ -1468,6 +1749,7 @@ class ArchipelagoBot(bot.bot_ai.BotAI):
         self.last_received_update: int = 0
         self.last_trade_cargo: set = set()
         self.last_supply_used: int = 0
+        self.last_tech_messages: typing.List[str] = []
         self.setup_done = False
         self.ctx = ctx
         self.ctx.last_bot = self
@@ -1499,7 +1781,8 @@ class ArchipelagoBot(bot.bot_ai.BotAI):
                 game_speed = self.ctx.game_speed_override
             else:
                 game_speed = self.ctx.game_speed
-            await self.chat_send(
+            # Everything the map needs before it can start goes out in a single request
+            setup_messages: typing.List[str] = [
                 "?SetOptions"
                 f" {difficulty}"
                 f" {self.ctx.generic_upgrade_research}"
@@ -1516,41 +1799,43 @@ class ArchipelagoBot(bot.bot_ai.BotAI):
                 f" {self.ctx.grant_story_levels}"
                 f" {self.ctx.enable_morphling}"
                 f" {mission_variant}"
-                f" {self.ctx.trade_enabled}"
-            )
-            await self.chat_send("?GiveResources {} {} {}".format(
-                start_items[SC2Race.ANY][0],
-                start_items[SC2Race.ANY][1],
-                start_items[SC2Race.ANY][2]
-            ))
-            await self.updateTerranTech(start_items)
-            await self.updateZergTech(start_items, kerrigan_level)
-            await self.updateProtossTech(start_items)
-            await self.updateColors()
+                f" {self.ctx.trade_enabled}",
+                "?GiveResources {} {} {}".format(
+                    start_items[SC2Race.ANY][0],
+                    start_items[SC2Race.ANY][1],
+                    start_items[SC2Race.ANY][2]
+                ),
+            ]
+            self.last_tech_messages = self.tech_update_messages(start_items, kerrigan_level)
+            setup_messages.extend(self.last_tech_messages)
+            setup_messages.extend(self.color_update_messages())
             if uncollected_objectives:
-                await self.chat_send("?UncollectedLocations {}".format(
-                    functools.reduce(lambda a, b: a + " " + b, [str(x) for x in uncollected_objectives])
-                ))
-            await self.chat_send("?LoadFinished")
+                setup_messages.append("?UncollectedLocations " + " ".join(map(str, uncollected_objectives)))
+            setup_messages.append("?LoadFinished")
+            await self.chat_send_many(setup_messages)
+            self.ctx.pending_color_update = False
             self.last_received_update = len(self.ctx.items_received)
 
         else:
             if self.ctx.pending_color_update:
                 await self.updateColors()
 
-            if not self.ctx.announcements.empty():
-                message = self.ctx.announcements.get(timeout=1)
+            if self.ctx.announcements:
+                message = self.ctx.announcements.popleft()
                 await self.chat_send("?SendMessage " + message)
-                self.ctx.announcements.task_done()
 
             # Archipelago reads the health
             controller1_state = 0
             controller2_state = 0
-            for unit in self.all_own_units():
-                if unit.health_max == CONTROLLER_HEALTH:
+            # Unit objects are rebuilt from the observation every step, so there is nothing to keep between steps;
+            # read health_max once per unit instead of once per comparison.
+            # Units.__iter__ wraps the list iterator in a generator, so iterate the underlying list directly
+            for unit in list.__iter__(self.all_own_units()):
+                health_max = unit.health_max
+                if health_max == CONTROLLER_HEALTH:
                     controller1_state = int(CONTROLLER_HEALTH - unit.health)
                     self.can_read_game = True
-                elif unit.health_max == CONTROLLER2_HEALTH:
+                elif health_max == CONTROLLER2_HEALTH:
                     controller2_state = int(CONTROLLER2_HEALTH - unit.health)
                     self.can_read_game = True
                 elif unit.name == TRADE_UNIT:
@@ -1607,9 +1892,7 @@ class ArchipelagoBot(bot.bot_ai.BotAI):
                 current_items = calculate_items(self.ctx)
                 missions_beaten = self.missions_beaten_count()
                 kerrigan_level = get_kerrigan_level(self.ctx, current_items, missions_beaten)
-                await self.updateTerranTech(current_items)
-                await self.updateZergTech(current_items, kerrigan_level)
-                await self.updateProtossTech(current_items)
+                await self.updateTech(current_items, kerrigan_level)
                 self.last_received_update = len(self.ctx.items_received)
 
             if game_state & 1:
@@ -1666,30 +1949,40 @@ class ArchipelagoBot(bot.bot_ai.BotAI):
         return result
 
     def missions_beaten_count(self):
-        return len([location for location in self.ctx.checked_locations if location % VICTORY_MODULO == 0])
+        return self.ctx.completed_mission_count()
+
+    def color_update_messages(self) -> typing.List[str]:
+        return [
+            "?SetColor rr " + str(self.ctx.player_color_raynor),
+            "?SetColor ks " + str(self.ctx.player_color_zerg),
+            "?SetColor pz " + str(self.ctx.player_color_zerg_primal),
+            "?SetColor da " + str(self.ctx.player_color_protoss),
+            "?SetColor nova " + str(self.ctx.player_color_nova),
+        ]
 
     async def updateColors(self):
-        await self.chat_send("?SetColor rr " + str(self.ctx.player_color_raynor))
-        await self.chat_send("?SetColor ks " + str(self.ctx.player_color_zerg))
-        await self.chat_send("?SetColor pz " + str(self.ctx.player_color_zerg_primal))
-        await self.chat_send("?SetColor da " + str(self.ctx.player_color_protoss))
-        await self.chat_send("?SetColor nova " + str(self.ctx.player_color_nova))
+        await self.chat_send_many(self.color_update_messages())
         self.ctx.pending_color_update = False
 
-    async def updateTerranTech(self, current_items):
+    def tech_update_messages(self, current_items, kerrigan_level) -> typing.List[str]:
         terran_items = current_items[SC2Race.TERRAN]
-        await self.chat_send("?GiveTerranTech " + " ".join(map(str, terran_items)))
-
-    async def updateZergTech(self, current_items, kerrigan_level):
-        zerg_items = current_items[SC2Race.ZERG]
-        zerg_items = [value for index, value in enumerate(zerg_items) if index not in [ZergItemType.Level.flag_word, ZergItemType.Primal_Form.flag_word]]
+        zerg_items = _ZERG_TECH_FLAG_WORDS(current_items[SC2Race.ZERG])
         kerrigan_primal_by_items = kerrigan_primal(self.ctx, kerrigan_level)
         kerrigan_primal_bot_value = 1 if kerrigan_primal_by_items else 0
-        await self.chat_send(f"?GiveZergTech {kerrigan_level} {kerrigan_primal_bot_value} " + ' '.join(map(str, zerg_items)))
-
-    async def updateProtossTech(self, current_items):
         protoss_items = current_items[SC2Race.PROTOSS]
-        await self.chat_send("?GiveProtossTech " + " ".join(map(str, protoss_items)))
+        return [
+            "?GiveTerranTech " + " ".join(map(str, terran_items)),
+            f"?GiveZergTech {kerrigan_level} {kerrigan_primal_bot_value} " + ' '.join(map(str, zerg_items)),
+            "?GiveProtossTech " + " ".join(map(str, protoss_items)),
+        ]
+
+    async def updateTech(self, current_items, kerrigan_level):
+        tech_messages = self.tech_update_messages(current_items, kerrigan_level)
+        # Each race has its own command, so only the races whose tech changed need to be re-sent
+        changed_messages = [message for message in tech_messages if message not in self.last_tech_messages]
+        if changed_messages:
+            await self.chat_send_many(changed_messages)
+        self.last_tech_messages = tech_messages
 
 def calc_unfinished_nodes(
         ctx: SC2Context
@@ -1712,33 +2005,36 @@ def is_mission_available(ctx: SC2Context, mission_id_to_check: int) -> bool:
 
     return mission_id_to_check in available_missions
 
-def calc_available_nodes(ctx: SC2Context) -> typing.Tuple[typing.List[int], typing.Dict[int, typing.List[int]], typing.List[int]]:
+def calc_available_nodes(ctx: SC2Context) -> AvailableNodes:
+    # Accessibility only changes when a mission is beaten or an item arrives; received items only ever grow,
+    # and a resend from index 0 clears the cache
+    cache_key = (ctx.mission_victory_location_ids.intersection(ctx.checked_locations), len(ctx.items_received))
+    if ctx.available_nodes_cache is not None and ctx.available_nodes_cache[0] == cache_key:
+        return ctx.available_nodes_cache[1]
+
     available_missions: typing.List[int] = []
     available_layouts: typing.Dict[int, typing.List[int]] = {}
     available_campaigns: typing.List[int] = []
 
-    beaten_missions = {mission_id for mission_id in ctx.mission_id_to_entry_rules if ctx.is_mission_completed(mission_id)}
-    received_items: typing.Dict[int, int] = {}
-    for network_item in ctx.items_received:
-        received_items.setdefault(network_item.item, 0)
-        received_items[network_item.item] += 1
+    mission_id_to_entry_rules = ctx.mission_id_to_entry_rules
+    beaten_missions = {mission_id for mission_id in mission_id_to_entry_rules if ctx.is_mission_completed(mission_id)}
+    received_items: typing.Dict[int, int] = collections.Counter(network_item.item for network_item in ctx.items_received)
 
     accessible_rules: typing.Set[int] = set()
-    for campaign_idx, campaign in enumerate(ctx.custom_mission_order):
+    for campaign_idx, campaign_rule, layout_nodes in ctx.mission_order_topology:
         available_layouts[campaign_idx] = []
-        if campaign.entry_rule.is_accessible(beaten_missions, received_items, ctx.mission_id_to_entry_rules, accessible_rules, []):
+        if campaign_rule.is_accessible(beaten_missions, received_items, mission_id_to_entry_rules, accessible_rules, []):
             available_campaigns.append(campaign_idx)
-            for layout_idx, layout in enumerate(campaign.layouts):
-                if layout.entry_rule.is_accessible(beaten_missions, received_items, ctx.mission_id_to_entry_rules, accessible_rules, []):
+            for layout_idx, layout_rule, mission_nodes in layout_nodes:
+                if layout_rule.is_accessible(beaten_missions, received_items, mission_id_to_entry_rules, accessible_rules, []):
                     available_layouts[campaign_idx].append(layout_idx)
-                    for column in layout.missions:
-                        for mission in column:
-                            if mission.mission_id == -1:
-                                continue
-                            if mission.entry_rule.is_accessible(beaten_missions, received_items, ctx.mission_id_to_entry_rules, accessible_rules, []):
-                                available_missions.append(mission.mission_id)
+                    for mission_id, mission_rule in mission_nodes:
+                        if mission_rule.is_accessible(beaten_missions, received_items, mission_id_to_entry_rules, accessible_rules, []):
+                            available_missions.append(mission_id)
 
-    return available_missions, available_layouts, available_campaigns
+    result = (available_missions, available_layouts, available_campaigns)
+    ctx.available_nodes_cache = (cache_key, result)
+    return result
 
 def check_game_install_path() -> bool:
     # First thing: go to the default location for ExecuteInfo.
@@ -1746,6 +2042,7 @@ def check_game_install_path() -> bool:
     if is_windows:
         # The next five lines of utterly inscrutable code are brought to you by copy-paste from Stack Overflow.
         # https://stackoverflow.com/questions/6227590/finding-the-users-my-documents-path/30924555#
+        import ctypes
         import ctypes.wintypes
         CSIDL_PERSONAL = 5  # My Documents
         SHGFP_TYPE_CURRENT = 0  # Get current, not default value
@@ -1764,7 +2061,7 @@ def check_game_install_path() -> bool:
         with open(einfo) as f:
             content = f.read()
         if content:
-            search_result = re.search(r" = (.*)Versions", content)
+            search_result = _EXECUTE_INFO_BASE_PATH.search(content)
             if not search_result:
                 sc2_logger.warning(f"Found {einfo}, but it was empty. Run SC2 through the Blizzard launcher, "
                                     "then try again.")
@@ -1792,30 +2089,56 @@ def check_game_install_path() -> bool:
     return False
 
 
+_REQUIRED_MODS: typing.Tuple[str, ...] = (
+    "ArchipelagoCore", "ArchipelagoPlayer", "ArchipelagoPlayerSuper", "ArchipelagoPatches",
+    "ArchipelagoTriggers", "ArchipelagoPlayerWoL", "ArchipelagoPlayerHotS",
+    "ArchipelagoPlayerLotV", "ArchipelagoPlayerLotVPrologue", "ArchipelagoPlayerNCO",
+)
+# Map files relative to Maps/ArchipelagoCampaign
+_REQUIRED_MAPS: typing.Tuple[str, ...] = (
+    *("WoL" + os.sep + mission.map_file + ".SC2Map" for mission in SC2Mission
+      if mission.campaign in (SC2Campaign.WOL, SC2Campaign.PROPHECY)),
+    *("HotS" + os.sep + mission.map_file + ".SC2Map" for mission in campaign_mission_table[SC2Campaign.HOTS]),
+    *("LotV" + os.sep + mission.map_file + ".SC2Map" for mission in SC2Mission
+      if mission.campaign in (SC2Campaign.LOTV, SC2Campaign.PROLOGUE, SC2Campaign.EPILOGUE)),
+    *("NCO" + os.sep + mission.map_file + ".SC2Map" for mission in campaign_mission_table[SC2Campaign.NCO]),
+)
+
+
+def _directory_entry_names(directory: Path, include_directories: bool) -> typing.Set[str]:
+    """Case-normalised names of the files (and optionally folders) in a directory; empty if it can't be read."""
+    try:
+        with os.scandir(directory) as entries:
+            return {
+                os.path.normcase(entry.name) for entry in entries
+                if entry.is_file() or (include_directories and entry.is_dir())
+            }
+    except OSError:
+        return set()
+
+
 def is_mod_installed_correctly() -> bool:
     """Searches for all required files."""
     if "SC2PATH" not in os.environ:
         check_game_install_path()
     sc2_path: str = os.environ["SC2PATH"]
     mapdir = sc2_path / Path('Maps/ArchipelagoCampaign')
-    mods = ["ArchipelagoCore", "ArchipelagoPlayer", "ArchipelagoPlayerSuper", "ArchipelagoPatches",
-            "ArchipelagoTriggers", "ArchipelagoPlayerWoL", "ArchipelagoPlayerHotS",
-            "ArchipelagoPlayerLotV", "ArchipelagoPlayerLotVPrologue", "ArchipelagoPlayerNCO"]
-    modfiles = [sc2_path / Path("Mods/" + mod + ".SC2Mod") for mod in mods]
-    wol_required_maps: typing.List[str] = ["WoL" + os.sep + mission.map_file + ".SC2Map" for mission in SC2Mission
-                         if mission.campaign in (SC2Campaign.WOL, SC2Campaign.PROPHECY)]
-    hots_required_maps: typing.List[str] = ["HotS" + os.sep + mission.map_file + ".SC2Map" for mission in campaign_mission_table[SC2Campaign.HOTS]]
-    lotv_required_maps: typing.List[str] = ["LotV" + os.sep + mission.map_file + ".SC2Map" for mission in SC2Mission
-                                            if mission.campaign in (SC2Campaign.LOTV, SC2Campaign.PROLOGUE, SC2Campaign.EPILOGUE)]
-    nco_required_maps: typing.List[str] = ["NCO" + os.sep + mission.map_file + ".SC2Map" for mission in campaign_mission_table[SC2Campaign.NCO]]
-    required_maps = wol_required_maps + hots_required_maps + lotv_required_maps + nco_required_maps
+    modfiles = [sc2_path / Path("Mods/" + mod + ".SC2Mod") for mod in _REQUIRED_MODS]
     needs_files = False
 
+    # One directory listing per campaign folder instead of a stat per file
+    present_maps: typing.Dict[str, typing.Set[str]] = {
+        subdir: _directory_entry_names(mapdir / subdir, include_directories=False)
+        for subdir in {os.path.dirname(mapfile) for mapfile in _REQUIRED_MAPS}
+    }
+    present_mods = _directory_entry_names(sc2_path / Path("Mods"), include_directories=True)
+    mods_found = [os.path.normcase(mod + ".SC2Mod") in present_mods for mod in _REQUIRED_MODS]
+
     # Check for maps.
-    missing_maps: typing.List[str] = []
-    for mapfile in required_maps:
-        if not os.path.isfile(mapdir / mapfile):
-            missing_maps.append(mapfile)
+    missing_maps: typing.List[str] = [
+        mapfile for mapfile in _REQUIRED_MAPS
+        if os.path.normcase(os.path.basename(mapfile)) not in present_maps[os.path.dirname(mapfile)]
+    ]
     if len(missing_maps) >= 19:
         sc2_logger.warning(f"All map files missing from {mapdir}.")
         needs_files = True
@@ -1828,8 +2151,8 @@ def is_mod_installed_correctly() -> bool:
         sc2_logger.debug(f"All maps found in {mapdir}.")
 
     # Check for mods.
-    for modfile in modfiles:
-        if os.path.isfile(modfile) or os.path.isdir(modfile):
+    for modfile, found in zip(modfiles, mods_found):
+        if found:
             sc2_logger.debug(f"Archipelago mod found at {modfile}.")
         else:
             sc2_logger.warning(f"Archipelago mod could not be found at {modfile}.")
@@ -1854,6 +2177,9 @@ class DllDirectory:
         self._new = new
 
     def __enter__(self):
+        if not is_windows:
+            # get() and set() are no-ops elsewhere, so there is nothing to swap or restore
+            return
         old = self.get()
         if self.set(self._new):
             self._old = old
@@ -1865,6 +2191,7 @@ class DllDirectory:
     @staticmethod
     def get() -> typing.Optional[str]:
         if sys.platform == "win32":
+            import ctypes
             n = ctypes.windll.kernel32.GetDllDirectoryW(0, None)
             buf = ctypes.create_unicode_buffer(n)
             ctypes.windll.kernel32.GetDllDirectoryW(n, buf)
@@ -1875,6 +2202,7 @@ class DllDirectory:
     @staticmethod
     def set(s: typing.Optional[str]) -> bool:
         if sys.platform == "win32":
+            import ctypes
             return ctypes.windll.kernel32.SetDllDirectoryW(s) != 0
         # NOTE: other OS may support os.environ["LD_LIBRARY_PATH"], but this fix is windows-specific
         return False
@@ -1888,45 +2216,52 @@ def download_latest_release_zip(
     force_download=False
 ) -> typing.Tuple[str, typing.Optional[str]]:
     """Downloads the latest release of a GitHub repo to the current directory as a .zip file."""
+    import tempfile
+    import zipfile
     import requests
 
     headers = {"Accept": 'application/vnd.github.v3+json'}
     url = f"https://api.github.com/repos/{owner}/{repo}/releases/tags/{api_version}"
 
     try:
-        r1 = requests.get(url, headers=headers)
-        if r1.status_code == 200:
-            latest_metadata = r1.json()
-            cleanup_downloaded_metadata(latest_metadata)
-            latest_metadata = str(latest_metadata)
+        release = get_release_info(url)
+        if isinstance(release, ReleaseInfo):
+            latest_metadata = release.metadata
             # sc2_logger.info(f"Latest version: {latest_metadata}.")
         else:
-            sc2_logger.warning(f"Status code: {r1.status_code}")
+            sc2_logger.warning(f"Status code: {release.status_code}")
             sc2_logger.warning(f"Failed to reach GitHub. Could not find download link.")
-            sc2_logger.warning(f"text: {r1.text}")
+            sc2_logger.warning(f"text: {release.text}")
             return "", metadata
 
-        if (force_download is False) and (metadata == latest_metadata):
+        if (force_download is False) and release.is_installed(metadata):
             sc2_logger.info("Latest version already installed.")
             return "", metadata
 
         sc2_logger.info(f"Attempting to download latest version of API version {api_version} of {repo}.")
-        download_url = r1.json()["assets"][0]["browser_download_url"]
-
-        r2 = requests.get(download_url, headers=headers)
-        if r2.status_code == 200 and zipfile.is_zipfile(io.BytesIO(r2.content)):
-            tempdir = tempfile.gettempdir()
-            file = tempdir + os.sep + f"{repo}.zip"
-            with open(file, "wb") as fh:
-                fh.write(r2.content)
-            sc2_logger.info(f"Successfully downloaded {repo}.zip. Installing...")
-            return file, latest_metadata
-        else:
+        download_url = release.download_url
+        if not download_url:
+            sc2_logger.warning(f"The latest release of {repo} has no downloadable assets. Could not find download link.")
+            return "", metadata
+
+        tempdir = tempfile.gettempdir()
+        file = tempdir + os.sep + f"{repo}.zip"
+        # Written to disk as it arrives, so the archive is never held in memory as a whole
+        with github_session().get(download_url, headers=headers, timeout=GITHUB_TIMEOUT_SECONDS, stream=True) as r2:
+            if r2.status_code == 200:
+                with open(file, "wb") as fh:
+                    for chunk in r2.iter_content(chunk_size=ZIP_DOWNLOAD_CHUNK_SIZE):
+                        fh.write(chunk)
+                if zipfile.is_zipfile(file):
+                    sc2_logger.info(f"Successfully downloaded {repo}.zip. Installing...")
+                    return file, latest_metadata
+                os.remove(file)
             sc2_logger.warning(f"Status code: {r2.status_code}")
             sc2_logger.warning("Download failed.")
-            sc2_logger.warning(f"text: {r2.text}")
+            if r2.status_code != 200:
+                sc2_logger.warning(f"text: {r2.text}")
             return "", metadata
-    except requests.ConnectionError:
+    except (requests.ConnectionError, requests.Timeout):
         sc2_logger.warning(f"Failed to reach GitHub. Could not find download link.")
         return "", metadata
 
@@ -1936,36 +2271,100 @@ def cleanup_downloaded_metadata(medatada_json: dict) -> None:
         del asset['download_count']
 
 
-def is_mod_update_available(owner: str, repo: str, api_version: str, metadata: str) -> bool:
+class ReleaseInfo(typing.NamedTuple):
+    metadata: str
+    """Digest of the release JSON without download counts, as stored in the metadata file"""
+    download_url: str
+    legacy_metadata: str
+    """str() of the same JSON, which older clients stored instead of the digest"""
+
+    def is_installed(self, stored_metadata: typing.Optional[str]) -> bool:
+        return stored_metadata == self.metadata or stored_metadata == self.legacy_metadata
+
+
+class ReleaseInfoError(typing.NamedTuple):
+    status_code: int
+    text: str
+
+
+# Seconds to wait for GitHub to connect or send more data, not the total download time
+GITHUB_TIMEOUT_SECONDS: int = 10
+
+
+@functools.lru_cache(maxsize=1)
+def github_session() -> "requests.Session":
+    """Shared session so the release lookup and the download reuse one keep-alive connection."""
     import requests
+    from requests.adapters import HTTPAdapter
 
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return session
+
+
+# Release info younger than this is reused without asking GitHub again,
+# so an update check followed by /download_data only fetches the zip
+RELEASE_INFO_MAX_AGE_SECONDS: int = 60
+# url -> (ETag, time.monotonic() of the last response, release info) of the last successful release lookup
+_release_info_cache: typing.Dict[str, typing.Tuple[str, float, ReleaseInfo]] = {}
+
+
+def get_release_info(url: str) -> typing.Union[ReleaseInfo, ReleaseInfoError]:
+    """Fetches a GitHub release. Lookups within RELEASE_INFO_MAX_AGE_SECONDS of the last response reuse it,
+    older ones send the last ETag, so an unchanged release comes back as an empty 304
+    that doesn't count against the API rate limit."""
     headers = {"Accept": 'application/vnd.github.v3+json'}
+    cached = _release_info_cache.get(url)
+    if cached is not None:
+        etag, fetched_at, release = cached
+        if time.monotonic() - fetched_at < RELEASE_INFO_MAX_AGE_SECONDS:
+            return release
+        if etag:
+            headers["If-None-Match"] = etag
+    response = github_session().get(url, headers=headers, timeout=GITHUB_TIMEOUT_SECONDS)
+    if response.status_code == 304 and cached is not None:
+        _release_info_cache[url] = (cached[0], time.monotonic(), cached[2])
+        return cached[2]
+    if response.status_code != 200:
+        return ReleaseInfoError(response.status_code, response.text)
+    release_json = orjson.loads(response.content)
+    download_url = release_json["assets"][0]["browser_download_url"] if release_json["assets"] else ""
+    cleanup_downloaded_metadata(release_json)
+    digest = hashlib.blake2b(orjson.dumps(release_json, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+    release = ReleaseInfo(digest, download_url, str(release_json))
+    _release_info_cache[url] = (response.headers.get("ETag", ""), time.monotonic(), release)
+    return release
+
+
+def is_mod_update_available(owner: str, repo: str, api_version: str, metadata: str) -> bool:
+    import requests
+
     url = f"https://api.github.com/repos/{owner}/{repo}/releases/tags/{api_version}"
 
     try:
-        r1 = requests.get(url, headers=headers)
-        if r1.status_code == 200:
-            latest_metadata = r1.json()
-            cleanup_downloaded_metadata(latest_metadata)
-            latest_metadata = str(latest_metadata)
-            if metadata != latest_metadata:
+        release = get_release_info(url)
+        if isinstance(release, ReleaseInfo):
+            if not release.is_installed(metadata):
                 return True
             else:
                 return False
 
         else:
             sc2_logger.warning(f"Failed to reach GitHub while checking for updates.")
-            sc2_logger.warning(f"Status code: {r1.status_code}")
-            sc2_logger.warning(f"text: {r1.text}")
+            sc2_logger.warning(f"Status code: {release.status_code}")
+            sc2_logger.warning(f"text: {release.text}")
             return False
-    except requests.ConnectionError:
+    except (requests.ConnectionError, requests.Timeout):
         sc2_logger.warning(f"Failed to reach GitHub while checking for updates.")
         return False
 
 
+_ALL_IN_MISSION_ID = SC2Mission.ALL_IN.id
+_HOTS_LOCATION_OFFSET = SC2HOTS_LOC_ID_OFFSET - _ALL_IN_MISSION_ID * VICTORY_MODULO
+
+
 def get_location_offset(mission_id: int) -> int:
-    return SC2WOL_LOC_ID_OFFSET if mission_id <= SC2Mission.ALL_IN.id \
-        else (SC2HOTS_LOC_ID_OFFSET - SC2Mission.ALL_IN.id * VICTORY_MODULO)
+    return SC2WOL_LOC_ID_OFFSET if mission_id <= _ALL_IN_MISSION_ID else _HOTS_LOCATION_OFFSET
 
 def get_location_id(mission_id: int, objective_id: int) -> int:
     return get_location_offset(mission_id) + mission_id * VICTORY_MODULO + objective_id
@@ -1986,6 +2385,7 @@ def force_settings_save_on_close() -> None:
 
 
 def launch():
+    import colorama
     colorama.init()
     asyncio.run(main())
     colorama.deinit()
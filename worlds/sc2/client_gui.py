@@ -6,24 +6,52 @@ from BaseClasses import ItemClassification
 from NetUtils import JSONMessagePart
 from kvui import GameManager, HoverBehavior, ServerToolTip, KivyJSONtoTextParser, LogtoUI
 from kivy.app import App
-from kivy.clock import Clock
+from kivy.clock import Clock, ClockEvent
 from kivy.uix.gridlayout import GridLayout
 from kivy.lang import Builder
 from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.scrollview import ScrollView
-from kivy.properties import StringProperty, BooleanProperty
+from kivy.properties import StringProperty, BooleanProperty, NumericProperty
 
 from worlds.sc2.client import SC2Context, calc_unfinished_nodes
 from worlds.sc2.item.item_descriptions import item_descriptions
 from worlds.sc2.mission_tables import lookup_id_to_mission, campaign_race_exceptions, \
     SC2Mission, SC2Race
-from worlds.sc2.locations import LocationType, lookup_location_id_to_type, lookup_location_id_to_flags
+from worlds.sc2.locations import LocationType, LocationFlag, lookup_location_id_to_type, lookup_location_id_to_flags
 from worlds.sc2.options import LocationInclusion
+from worlds.sc2.mission_order.structs import CampaignSlotData
 from worlds.sc2 import SC2World
 
 
+# Mission table colours
+COLOR_MISSION_IMPORTANT = "6495ED" # blue
+COLOR_MISSION_UNIMPORTANT = "A0BEF4" # lighter blue
+COLOR_MISSION_CLEARED = "FFFFFF" # white
+COLOR_MISSION_LOCKED = "A9A9A9" # gray
+COLOR_PARENT_LOCKED = "848484" # darker gray
+COLOR_MISSION_FINAL = "FFBC95" # orange
+COLOR_MISSION_FINAL_LOCKED = "D0C0BE" # gray + orange
+COLOR_FINAL_PARENT_LOCKED = "D0C0BE" # gray + orange
+COLOR_FINAL_MISSION_REMINDER = "FF5151" # light red
+COLOR_VICTORY_LOCATION = "FFC156" # gold
+
+_LOCATION_TYPE_TITLES: Dict[LocationType, str] = {
+    location_type: location_type.name.title().replace("_", " ") for location_type in LocationType
+}
+_LOCATION_INCLUSION_TITLE_SUFFIXES: Dict[int, str] = {
+    LocationInclusion.option_disabled: " (Nothing)",
+    LocationInclusion.option_resources: " (Resources)",
+}
+
+# Item descriptions with their line breaks converted to tooltip markup
+_item_descriptions_html: Dict[str, str] = {
+    item_name: description.replace(". \n", ".<br>").replace(". ", ".<br>").replace("\n", "<br>")
+    for item_name, description in item_descriptions.items()
+}
+
+
 class HoverableButton(HoverBehavior, Button):
     pass
 
@@ -32,6 +60,7 @@ class MissionButton(HoverableButton):
     tooltip_text = StringProperty("Test")
     is_exit = BooleanProperty(False)
     is_goal = BooleanProperty(False)
+    mission_id = NumericProperty(-1)
 
     def __init__(self, *args, **kwargs):
         super(HoverableButton, self).__init__(*args, **kwargs)
@@ -87,7 +116,7 @@ class MissionCategory(GridLayout):
 class SC2JSONtoKivyParser(KivyJSONtoTextParser):
     def _handle_item_name(self, node: JSONMessagePart):
         item_name = node["text"]
-        if item_name not in item_descriptions:
+        if item_name not in _item_descriptions_html:
             return super()._handle_item_name(node)
 
         flags = node.get("flags", 0)
@@ -102,8 +131,7 @@ class SC2JSONtoKivyParser(KivyJSONtoTextParser):
             item_types.append("normal")
 
         # TODO: Some descriptions are too long and get cut off. Is there a general solution or does someone need to manually check every description?
-        desc = item_descriptions[item_name].replace(". \n", ".<br>").replace(". ", ".<br>").replace("\n", "<br>")
-        ref = "Item Class: " + ", ".join(item_types) + "<br><br>" + desc
+        ref = "Item Class: " + ", ".join(item_types) + "<br><br>" + _item_descriptions_html[item_name]
         node.setdefault("refs", []).append(ref)
         return super(KivyJSONtoTextParser, self)._handle_item_name(node)
 
@@ -125,10 +153,17 @@ class SC2Manager(GameManager):
     last_checked_locations: Set[int] = set()
     last_data_out_of_date = False
     mission_id_to_button: Dict[int, MissionButton] = {}
+    # mission id -> (layout index, layout name, is a layout exit, campaign index, campaign name, is a campaign exit)
+    mission_id_to_button_slot: Dict[int, Tuple[int, str, bool, int, str, bool]] = {}
+    built_mission_order: Optional[List[CampaignSlotData]] = None
+    campaign_longest_columns: List[int] = []
+    valuable_location_types: Set[LocationType] = set()
+    excluded_location_flags: LocationFlag = LocationFlag.NONE
     launching: Union[bool, int] = False  # if int -> mission ID
     refresh_from_launching = True
     first_check = True
     first_mission = ""
+    mission_table_trigger: Optional[ClockEvent] = None
     button_colors: Dict[SC2Race, Tuple[float, float, float]] = {}
     ctx: SC2Context
 
@@ -166,10 +201,17 @@ class SC2Manager(GameManager):
         self.campaign_panel = MultiCampaignLayout()
         panel.content.add_widget(self.campaign_panel)
 
-        Clock.schedule_interval(self.build_mission_table, 0.5)
+        # The table is redrawn when the client reports a change; the slow interval only catches stragglers
+        self.mission_table_trigger = Clock.create_trigger(self.build_mission_table)
+        self.mission_table_trigger()
+        Clock.schedule_interval(self.build_mission_table, 5)
 
         return container
 
+    def refresh_mission_table(self) -> None:
+        if self.mission_table_trigger is not None:
+            self.mission_table_trigger()
+
     def build_mission_table(self, dt) -> None:
         if self.launching:
             assert self.campaign_panel is not None
@@ -183,19 +225,32 @@ class SC2Manager(GameManager):
                 self.ctx.ui.clear_tooltip()
             return
         
-        needs_redraw = (
-            self.last_checked_locations != self.ctx.checked_locations
-            or not self.refresh_from_launching
+        needs_rebuild = (
+            not self.refresh_from_launching
             or self.last_data_out_of_date != self.ctx.data_out_of_date
             or self.first_check
+            or self.built_mission_order is not self.ctx.custom_mission_order
         )
-        if not needs_redraw:
-            return
+        if needs_rebuild:
+            self.rebuild_mission_table()
+        elif self.last_checked_locations != self.ctx.checked_locations:
+            self.update_mission_table()
 
+    def rebuild_mission_table(self) -> None:
+        """Recreates every widget of the mission table. Only needed when the layout itself changes."""
         assert self.campaign_panel is not None
         self.refresh_from_launching = True
+        if self.built_mission_order is not self.ctx.custom_mission_order:
+            # Column lengths only depend on the mission order, so they are measured once per order
+            self.campaign_longest_columns = [
+                max(len(col) for layout in campaign.layouts for col in layout.missions)
+                for campaign in self.ctx.custom_mission_order
+            ]
+            self.built_mission_order = self.ctx.custom_mission_order
 
         self.campaign_panel.clear_widgets()
+        self.mission_id_to_button = {}
+        self.mission_id_to_button_slot = {}
         if self.ctx.data_out_of_date:
             self.campaign_panel.add_widget(Label(text="", padding=[0, 5, 0, 5]))
             warning_label = DownloadDataWarningMessage(
@@ -207,6 +262,15 @@ class SC2Manager(GameManager):
         else:
             self.campaign_scroll_panel.border_on = False
         self.last_data_out_of_date = self.ctx.data_out_of_date
+        # Location inclusions only change on connecting, which always comes with a rebuild
+        self.valuable_location_types = {
+            location_type for location_type, inclusion in self.ctx.location_inclusions.items()
+            if inclusion == LocationInclusion.option_enabled
+        }
+        self.excluded_location_flags = LocationFlag.NONE
+        for flag, inclusion in self.ctx.location_inclusions_by_flag.items():
+            if inclusion != LocationInclusion.option_enabled:
+                self.excluded_location_flags |= flag
         if len(self.ctx.custom_mission_order) == 0:
             self.campaign_panel.add_widget(Label(text="Connect to a world to see a mission layout here."))
             return
@@ -215,16 +279,14 @@ class SC2Manager(GameManager):
         self.last_checked_locations = self.ctx.checked_locations.copy()
         self.first_check = False
 
-        self.mission_id_to_button = {}
-
-        available_missions, available_layouts, available_campaigns, unfinished_missions = calc_unfinished_nodes(self.ctx)
+        unfinished_nodes = calc_unfinished_nodes(self.ctx)
 
         multi_campaign_layout_height = 0
 
         MISSION_BUTTON_HEIGHT = 50
         MISSION_BUTTON_PADDING = 6
         for campaign_idx, campaign in enumerate(self.ctx.custom_mission_order):
-            longest_column = max(len(col) for layout in campaign.layouts for col in layout.missions)
+            longest_column = self.campaign_longest_columns[campaign_idx]
             if longest_column == 1:
                 campaign_layout_height = 115
             else:
@@ -235,11 +297,13 @@ class SC2Manager(GameManager):
                 Label(text=campaign.name, size_hint_y=None, height=25, outline_width=1)
             )
             mission_layout = MissionLayout(padding=[10,0,10,0])
+            campaign_exits = frozenset(campaign.exits)
             for layout_idx, layout in enumerate(campaign.layouts):
                 layout_panel = RegionLayout()
                 layout_panel.add_widget(
                     Label(text=layout.name, size_hint_y=None, height=25, outline_width=1))
                 column_panel = ColumnLayout()
+                layout_exits = frozenset(layout.exits)
 
                 for column in layout.missions:
                     category_panel = MissionCategory(padding=[3,MISSION_BUTTON_PADDING,3,MISSION_BUTTON_PADDING])
@@ -254,23 +318,12 @@ class SC2Manager(GameManager):
                             continue
 
                         mission_obj = lookup_id_to_mission[mission_id]
-                        mission_finished = self.ctx.is_mission_completed(mission_id)
-                        is_layout_exit = mission_id in layout.exits and not mission_finished
-                        is_campaign_exit = mission_id in campaign.exits and not mission_finished
-
-                        text, tooltip = self.mission_text(
-                            self.ctx, mission_id, mission_obj,
-                            layout_idx, is_layout_exit, layout.name,
-                            campaign_idx, is_campaign_exit, campaign.name,
-                            available_missions, available_layouts, available_campaigns, unfinished_missions
+                        mission_button = MissionButton(
+                            mission_id=mission_id, size_hint_y=None, height=MISSION_BUTTON_HEIGHT
                         )
 
-                        mission_button = MissionButton(text=text, size_hint_y=None, height=MISSION_BUTTON_HEIGHT)
-
                         if mission_id in self.ctx.final_mission_ids:
                             mission_button.is_goal = True
-                        if is_layout_exit or is_campaign_exit:
-                            mission_button.is_exit = True
 
                         mission_race = mission_obj.race
                         if mission_race == SC2Race.ANY:
@@ -278,9 +331,13 @@ class SC2Manager(GameManager):
                         race = campaign_race_exceptions.get(mission_obj, mission_race)
                         if race in self.button_colors:
                             mission_button.background_color = self.button_colors[race]
-                        mission_button.tooltip_text = tooltip
                         mission_button.bind(on_press=self.mission_callback)
                         self.mission_id_to_button[mission_id] = mission_button
+                        self.mission_id_to_button_slot[mission_id] = (
+                            layout_idx, layout.name, mission_id in layout_exits,
+                            campaign_idx, campaign.name, mission_id in campaign_exits,
+                        )
+                        self.update_mission_button(mission_id, unfinished_nodes)
                         category_panel.add_widget(mission_button)
 
                     # layout_panel.add_widget(Label(text=""))
@@ -291,25 +348,47 @@ class SC2Manager(GameManager):
             self.campaign_panel.add_widget(campaign_layout)
         self.campaign_panel.height = multi_campaign_layout_height
 
+    def update_mission_table(self) -> None:
+        """Refreshes the text and tooltips of the existing mission buttons after new checks."""
+        self.last_checked_locations = self.ctx.checked_locations.copy()
+        # Any check can satisfy an entry rule elsewhere in the order, so every button is re-evaluated,
+        # but no widgets are created and Kivy only redraws the buttons whose properties actually changed
+        unfinished_nodes = calc_unfinished_nodes(self.ctx)
+        for mission_id in self.mission_id_to_button:
+            self.update_mission_button(mission_id, unfinished_nodes)
+
+    def update_mission_button(
+        self, mission_id: int, unfinished_nodes: Tuple[List[int], Dict[int, List[int]], List[int], Set[int]]
+    ) -> None:
+        available_missions, available_layouts, available_campaigns, unfinished_missions = unfinished_nodes
+        (
+            layout_idx, layout_name, in_layout_exits, campaign_idx, campaign_name, in_campaign_exits
+        ) = self.mission_id_to_button_slot[mission_id]
+        mission_finished = self.ctx.is_mission_completed(mission_id)
+        is_layout_exit = in_layout_exits and not mission_finished
+        is_campaign_exit = in_campaign_exits and not mission_finished
+
+        text, tooltip = self.mission_text(
+            self.ctx, mission_id, lookup_id_to_mission[mission_id],
+            layout_idx, is_layout_exit, layout_name,
+            campaign_idx, is_campaign_exit, campaign_name,
+            available_missions, available_layouts, available_campaigns, unfinished_missions
+        )
+
+        mission_button = self.mission_id_to_button[mission_id]
+        mission_button.text = text
+        mission_button.tooltip_text = tooltip
+        mission_button.is_exit = is_layout_exit or is_campaign_exit
+
     def mission_text(
         self, ctx: SC2Context, mission_id: int, mission_obj: SC2Mission,
         layout_id: int, is_layout_exit: bool, layout_name: str, campaign_id: int, is_campaign_exit: bool, campaign_name: str,
         available_missions: List[int], available_layouts: Dict[int, List[int]], available_campaigns: List[int],
         unfinished_missions: List[int]
     ) -> Tuple[str, str]:
-        COLOR_MISSION_IMPORTANT = "6495ED" # blue
-        COLOR_MISSION_UNIMPORTANT = "A0BEF4" # lighter blue
-        COLOR_MISSION_CLEARED = "FFFFFF" # white
-        COLOR_MISSION_LOCKED = "A9A9A9" # gray
-        COLOR_PARENT_LOCKED = "848484" # darker gray
-        COLOR_MISSION_FINAL = "FFBC95" # orange
-        COLOR_MISSION_FINAL_LOCKED = "D0C0BE" # gray + orange
-        COLOR_FINAL_PARENT_LOCKED = "D0C0BE" # gray + orange
-        COLOR_FINAL_MISSION_REMINDER = "FF5151" # light red
-        COLOR_VICTORY_LOCATION = "FFC156" # gold
-
         text = mission_obj.mission_name
-        tooltip: str = ""
+        # Joined once at the end rather than growing a string piece by piece
+        tooltip_parts: List[str] = []
         remaining_locations, plando_locations, remaining_count = self.sort_unfinished_locations(mission_id)
         campaign_locked = campaign_id not in available_campaigns
         layout_locked = layout_id not in available_layouts[campaign_id]
@@ -330,26 +409,26 @@ class SC2Manager(GameManager):
             extra_reqs = False
             if campaign_locked:
                 text = f"[color={COLOR_PARENT_LOCKED}]{text}[/color]"
-                tooltip += "To unlock this campaign, "
+                tooltip_parts.append("To unlock this campaign, ")
                 shown_rule = campaign_rule
                 extra_reqs = layout_has_rule or mission_has_rule
             elif layout_locked:
                 text = f"[color={COLOR_PARENT_LOCKED}]{text}[/color]"
-                tooltip += "To unlock this questline, "
+                tooltip_parts.append("To unlock this questline, ")
                 shown_rule = layout_rule
                 extra_reqs = mission_has_rule
             else:
                 text = f"[color={COLOR_MISSION_LOCKED}]{text}[/color]"
-                tooltip += "To unlock this mission, "
+                tooltip_parts.append("To unlock this mission, ")
                 shown_rule = mission_rule
             rule_tooltip = shown_rule.tooltip(0, lookup_id_to_mission)
-            tooltip += rule_tooltip.replace(rule_tooltip[0], rule_tooltip[0].lower(), 1)
+            tooltip_parts.append(rule_tooltip.replace(rule_tooltip[0], rule_tooltip[0].lower(), 1))
             extra_word = "are"
             if shown_rule.shows_single_rule():
                 extra_word = "is"
-                tooltip += "."
+                tooltip_parts.append(".")
             if extra_reqs:
-                tooltip += f"\nThis mission has additional requirements\nthat will be shown once the above {extra_word} met."
+                tooltip_parts.append(f"\nThis mission has additional requirements\nthat will be shown once the above {extra_word} met.")
 
         # Mark exit missions
         exit_for: str = ""
@@ -360,9 +439,9 @@ class SC2Manager(GameManager):
                 exit_for += " and "
             exit_for += campaign_name if campaign_name else "this campaign"
         if exit_for:
-            if tooltip:
-                tooltip += "\n\n"
-            tooltip += f"Required to beat {exit_for}"
+            if tooltip_parts:
+                tooltip_parts.append("\n\n")
+            tooltip_parts.append(f"Required to beat {exit_for}")
 
         # Mark goal missions
         if mission_id in self.ctx.final_mission_ids:
@@ -372,90 +451,83 @@ class SC2Manager(GameManager):
                 text = f"[color={COLOR_FINAL_PARENT_LOCKED}]{mission_obj.mission_name}[/color]"
             else:
                 text = f"[color={COLOR_MISSION_FINAL_LOCKED}]{mission_obj.mission_name}[/color]"
-            if tooltip and not exit_for:
-                tooltip += "\n\n"
+            if tooltip_parts and not exit_for:
+                tooltip_parts.append("\n\n")
             elif exit_for:
-                tooltip += "\n"
-            tooltip += f"[color={COLOR_FINAL_MISSION_REMINDER}]Required to beat the world[/color]"
+                tooltip_parts.append("\n")
+            tooltip_parts.append(f"[color={COLOR_FINAL_MISSION_REMINDER}]Required to beat the world[/color]")
 
         # Populate remaining location list
         if remaining_count > 0:
-            if tooltip:
-                tooltip += "\n\n"
-            tooltip += f"[b][color={COLOR_MISSION_IMPORTANT}]Uncollected locations[/color][/b]"
+            if tooltip_parts:
+                tooltip_parts.append("\n\n")
+            tooltip_parts.append(f"[b][color={COLOR_MISSION_IMPORTANT}]Uncollected locations[/color][/b]")
             last_location_type = LocationType.VICTORY
             for location_type, location_name, _ in remaining_locations:
                 if location_type != last_location_type:
-                    tooltip += f"\n[color={COLOR_MISSION_IMPORTANT}]{self.get_location_type_title(location_type)}:[/color]"
+                    tooltip_parts.append(f"\n[color={COLOR_MISSION_IMPORTANT}]{self.get_location_type_title(location_type)}:[/color]")
                     last_location_type = location_type
                 if location_type == LocationType.VICTORY:
                     victory_loc = location_name.replace(":", f":[color={COLOR_VICTORY_LOCATION}]")
-                    tooltip += f"\n- {victory_loc}[/color]"
+                    tooltip_parts.append(f"\n- {victory_loc}[/color]")
                 else:
-                    tooltip += f"\n- {location_name}"
+                    tooltip_parts.append(f"\n- {location_name}")
             if len(plando_locations) > 0:
-                tooltip += f"\n[b]Plando:[/b]\n- "
-                tooltip += "\n- ".join(plando_locations)
+                tooltip_parts.append(f"\n[b]Plando:[/b]\n- ")
+                tooltip_parts.append("\n- ".join(plando_locations))
 
-        tooltip = f"[b]{text}[/b]\n" + tooltip
+        tooltip = f"[b]{text}[/b]\n" + "".join(tooltip_parts)
         return text, tooltip
         
 
     def mission_callback(self, button: MissionButton) -> None:
         if not self.launching:
-            mission_id: int = next(k for k, v in self.mission_id_to_button.items() if v == button)
+            mission_id: int = button.mission_id
             if self.ctx.play_mission(mission_id):
                 self.launching = mission_id
+                self.refresh_mission_table()
                 Clock.schedule_once(self.finish_launching, 10)
 
     def finish_launching(self, dt):
         self.launching = False
+        self.refresh_mission_table()
     
     def sort_unfinished_locations(self, mission_id: int) -> Tuple[List[Tuple[LocationType, str, int]], List[str], int]:
         locations: List[Tuple[LocationType, str, int]] = []
-        location_name_to_index: Dict[str, int] = {}
-        for loc in self.ctx.locations_for_mission_id(mission_id):
-            if loc in self.ctx.missing_locations:
-                location_name = self.ctx.location_names.lookup_in_game(loc)
-                location_name_to_index[location_name] = len(locations)
-                locations.append((
-                    lookup_location_id_to_type[loc],
-                    location_name,
-                    loc,
-                ))
+        location_names: Set[str] = set()
+        # Order doesn't matter here, the result is sorted before returning
+        for loc in self.ctx.missing_locations.intersection(self.ctx.locations_for_mission_id(mission_id)):
+            location_name = self.ctx.location_names.lookup_in_game(loc)
+            location_names.add(location_name)
+            locations.append((
+                lookup_location_id_to_type[loc],
+                location_name,
+                loc,
+            ))
         count = len(locations)
 
-        plando_locations = []
-        elements_to_remove: Set[Tuple[LocationType, str, int]] = set()
-        for plando_loc_name in self.ctx.plando_locations:
-            if plando_loc_name in location_name_to_index:
-                elements_to_remove.add(locations[location_name_to_index[plando_loc_name]])
-                plando_locations.append(plando_loc_name)
-        for element in elements_to_remove:
-            locations.remove(element)
+        plando_locations = [
+            plando_loc_name for plando_loc_name in self.ctx.plando_locations if plando_loc_name in location_names
+        ]
+        if plando_locations:
+            plando_names = set(plando_locations)
+            locations = [location for location in locations if location[1] not in plando_names]
 
         return sorted(locations), plando_locations, count
 
     def any_valuable_locations(self, locations: List[Tuple[LocationType, str, int]]) -> bool:
+        valuable_location_types = self.valuable_location_types
+        excluded_location_flags = self.excluded_location_flags
         for location_type, _, location_id in locations:
-            if (self.ctx.location_inclusions[location_type] == LocationInclusion.option_enabled
-                and all(
-                    self.ctx.location_inclusions_by_flag[flag] == LocationInclusion.option_enabled
-                    for flag in lookup_location_id_to_flags[location_id].values()
-                )
+            if (location_type in valuable_location_types
+                and not lookup_location_id_to_flags[location_id] & excluded_location_flags
             ):
                 return True
         return False
 
     def get_location_type_title(self, location_type: LocationType) -> str:
-        title = location_type.name.title().replace("_", " ")
-        if self.ctx.location_inclusions[location_type] == LocationInclusion.option_disabled:
-            title += " (Nothing)"
-        elif self.ctx.location_inclusions[location_type] == LocationInclusion.option_resources:
-            title += " (Resources)"
-        else:
-            title += ""
-        return title
+        inclusion = self.ctx.location_inclusions[location_type]
+        return _LOCATION_TYPE_TITLES[location_type] + _LOCATION_INCLUSION_TITLE_SUFFIXES.get(inclusion, "")
 
 def start_gui(context: SC2Context):
     context.ui = SC2Manager(context)
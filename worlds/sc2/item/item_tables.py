@@ -2446,5 +2446,6 @@ for key, values in upgrade_bundles.items():
 
 lookup_id_to_name: typing.Dict[int, str] = {data.code: item_name for item_name, data in get_full_item_list().items() if
                                             data.code}
+lookup_id_to_item_data: typing.Dict[int, ItemData] = {data.code: data for data in get_full_item_list().values() if data.code}
 
 upgrade_item_types = (TerranItemType.Upgrade, ZergItemType.Upgrade, ProtossItemType.Upgrade)
@@ -262,6 +262,8 @@ class SubRuleRuleData(RuleData):
     rule_id: int
     sub_rules: List[RuleData]
     amount: int
+    # Set once a top-level rule is found accessible; see parse_from_dict()
+    buffer_accessible = False
 
     @staticmethod
     def parse_from_dict(data: Dict[str, Any]) -> SubRuleRuleData:
@@ -280,11 +282,14 @@ class SubRuleRuleData(RuleData):
                 )
             elif "amount" in rule_data:
                 rule = CountMissionsRuleData(
-                    **{field: value for field, value in rule_data.items()}
+                    rule_data["mission_ids"],
+                    rule_data["amount"],
+                    rule_data["visual_reqs"]
                 )
             else:
                 rule = BeatMissionsRuleData(
-                    **{field: value for field, value in rule_data.items()}
+                    rule_data["mission_ids"],
+                    rule_data["visual_reqs"]
                 )
             sub_rules.append(rule)
         rule = SubRuleRuleData(
@@ -1005,6 +1005,15 @@ class CampaignSlotData:
     def legacy(name: str, layouts: List[LayoutSlotData]) -> CampaignSlotData:
         return CampaignSlotData(name, SubRuleRuleData.empty(), [], layouts)
 
+    @staticmethod
+    def parse_from_dict(data: Dict[str, Any]) -> CampaignSlotData:
+        return CampaignSlotData(
+            data["name"],
+            SubRuleRuleData.parse_from_dict(data["entry_rule"]),
+            data["exits"],
+            [LayoutSlotData.parse_from_dict(layout_data) for layout_data in data["layouts"]],
+        )
+
 @dataclass
 class LayoutSlotData:
     name: str
@@ -1016,6 +1025,16 @@ class LayoutSlotData:
     def legacy(name: str, missions: List[List[MissionSlotData]]) -> LayoutSlotData:
         return LayoutSlotData(name, SubRuleRuleData.empty(), [], missions)
 
+    @staticmethod
+    def parse_from_dict(data: Dict[str, Any]) -> LayoutSlotData:
+        parse_mission = MissionSlotData.parse_from_dict
+        return LayoutSlotData(
+            data["name"],
+            SubRuleRuleData.parse_from_dict(data["entry_rule"]),
+            data["exits"],
+            [[parse_mission(mission_data) for mission_data in column] for column in data["missions"]],
+        )
+
 @dataclass
 class MissionSlotData:
     mission_id: int
@@ -1030,6 +1049,14 @@ class MissionSlotData:
     def legacy(mission_id: int, prev_mission_ids: List[int], entry_rule: SubRuleRuleData) -> MissionSlotData:
         return MissionSlotData(mission_id, prev_mission_ids, entry_rule)
 
+    @staticmethod
+    def parse_from_dict(data: Dict[str, Any]) -> MissionSlotData:
+        return MissionSlotData(
+            data["mission_id"],
+            data["prev_mission_ids"],
+            SubRuleRuleData.parse_from_dict(data["entry_rule"]),
+        )
+
 class MissionEntryRules(NamedTuple):
     mission_rule: SubRuleRuleData
     layout_rule: SubRuleRuleData
@@ -0,0 +1,307 @@
+"""
+Unit tests for the state the SC2 client derives from received items
+"""
+import collections
+import os
+import random
+import tempfile
+import typing
+import unittest
+from unittest import mock
+
+from CommonClient import process_server_cmd
+from NetUtils import NetworkItem
+from .. import client
+from ..item import item_names
+from ..item.item_tables import get_full_item_list
+from ..mission_tables import SC2Mission
+
+
+def random_item_ids(seed: int, count: int) -> typing.List[int]:
+    item_table = get_full_item_list()
+    item_ids = sorted(item.code for item in item_table.values() if item.code is not None)
+    rng = random.Random(seed)
+    return [rng.choice(item_ids) for _ in range(count)]
+
+
+def make_context(slot_data_version: int = 4) -> client.SC2Context:
+    ctx = client.SC2Context(None, None)
+    ctx.slot = 1
+    ctx.slot_data_version = slot_data_version
+    return ctx
+
+
+async def receive_items(ctx: client.SC2Context, index: int, item_ids: typing.List[int]) -> None:
+    await process_server_cmd(ctx, {
+        "cmd": "ReceivedItems",
+        "index": index,
+        "items": [NetworkItem(item_id, 100 + index + offset, 1, 0) for offset, item_id in enumerate(item_ids)],
+    })
+
+
+def entry_rule(rule_id: int, sub_rules: typing.List[typing.Dict[str, typing.Any]]) -> typing.Dict[str, typing.Any]:
+    return {"rule_id": rule_id, "sub_rules": sub_rules, "amount": len(sub_rules)}
+
+
+MARINE_ID = get_full_item_list()[item_names.MARINE].code
+# Liberation Day is open, The Outlaws needs Liberation Day beaten and Zero Hour needs a Marine
+MISSION_ORDER_SLOT_DATA = {
+    "version": 4,
+    "game_difficulty": 1,
+    "all_in_map": 0,
+    "final_mission_ids": [SC2Mission.ZERO_HOUR.id],
+    "custom_mission_order": [{
+        "name": "Campaign",
+        "entry_rule": entry_rule(-1, []),
+        "exits": [],
+        "layouts": [{
+            "name": "Layout",
+            "entry_rule": entry_rule(-1, []),
+            "exits": [],
+            "missions": [[
+                {"mission_id": SC2Mission.LIBERATION_DAY.id, "prev_mission_ids": [], "entry_rule": entry_rule(-1, [])},
+                {
+                    "mission_id": SC2Mission.THE_OUTLAWS.id,
+                    "prev_mission_ids": [SC2Mission.LIBERATION_DAY.id],
+                    "entry_rule": entry_rule(0, [{
+                        "mission_ids": [SC2Mission.LIBERATION_DAY.id], "visual_reqs": [SC2Mission.LIBERATION_DAY.id]
+                    }]),
+                },
+                {
+                    "mission_id": SC2Mission.ZERO_HOUR.id,
+                    "prev_mission_ids": [],
+                    "entry_rule": entry_rule(1, [{"item_ids": {str(MARINE_ID): 1}, "visual_reqs": [item_names.MARINE]}]),
+                },
+            ]],
+        }],
+    }],
+}
+
+
+class TestReceivedItemsState(unittest.IsolatedAsyncioTestCase):
+    async def full_computation(
+        self, item_ids: typing.List[int], slot_data_version: int
+    ) -> typing.Dict[client.SC2Race, typing.List[int]]:
+        ctx = make_context(slot_data_version)
+        await receive_items(ctx, 0, item_ids)
+        return client.calculate_items(ctx)
+
+    async def test_incremental_items_match_full_computation(self) -> None:
+        for slot_data_version in (2, 3, 4):
+            with self.subTest(slot_data_version=slot_data_version):
+                item_ids = random_item_ids(slot_data_version, 400)
+                ctx = make_context(slot_data_version)
+                await receive_items(ctx, 0, item_ids[:150])
+                client.calculate_items(ctx)
+                await receive_items(ctx, 150, item_ids[150:])
+                self.assertEqual(
+                    client.calculate_items(ctx), await self.full_computation(item_ids, slot_data_version)
+                )
+
+    async def test_items_resent_from_index_0_replace_the_state(self) -> None:
+        first_items = random_item_ids(10, 300)
+        replacement_items = random_item_ids(11, 300)
+        ctx = make_context()
+        await receive_items(ctx, 0, first_items)
+        client.calculate_items(ctx)
+        await receive_items(ctx, 0, replacement_items)
+        self.assertEqual(client.calculate_items(ctx), await self.full_computation(replacement_items, 4))
+        self.assertEqual(ctx.received_item_ids, set(replacement_items))
+
+    async def test_zero_value_items_keep_every_flag_word(self) -> None:
+        starting_minerals = get_full_item_list()[item_names.STARTING_MINERALS]
+        ctx = make_context()
+        ctx.minerals_per_item = 0
+        await receive_items(ctx, 0, [starting_minerals.code, starting_minerals.code, MARINE_ID])
+        accumulators = client.calculate_items(ctx)
+        self.assertEqual(accumulators.keys(), client._ACCUMULATOR_TEMPLATE.keys())
+        for race, flag_words in client._ACCUMULATOR_TEMPLATE.items():
+            self.assertEqual(len(accumulators[race]), len(flag_words))
+        self.assertEqual(accumulators[starting_minerals.race][starting_minerals.type.flag_word], 0)
+
+
+class ConnectedClientTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        # Keep the install checks done on connecting away from any real SC2 install
+        self.sc2_path = tempfile.TemporaryDirectory()
+        self.addCleanup(self.sc2_path.cleanup)
+        patcher = mock.patch.dict(os.environ, {"SC2PATH": self.sc2_path.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def connect(self, item_ids: typing.List[int]) -> client.SC2Context:
+        ctx = make_context()
+        ctx.server_locations = {
+            client.get_location_id(mission.id, 0)
+            for mission in (SC2Mission.LIBERATION_DAY, SC2Mission.THE_OUTLAWS, SC2Mission.ZERO_HOUR)
+        }
+        ctx.missing_locations = set(ctx.server_locations)
+        ctx.on_package("Connected", {"slot_data": MISSION_ORDER_SLOT_DATA})
+        ctx.items_received = [NetworkItem(item_id, 100 + index, 1, 0) for index, item_id in enumerate(item_ids)]
+        return ctx
+
+
+class TestAvailableNodesCache(ConnectedClientTestCase):
+    def uncached_available_missions(self, ctx: client.SC2Context) -> typing.List[int]:
+        fresh_ctx = self.connect([network_item.item for network_item in ctx.items_received])
+        fresh_ctx.checked_locations = set(ctx.checked_locations)
+        return client.calc_available_nodes(fresh_ctx)[0]
+
+    async def test_cache_hit_matches_uncached_result(self) -> None:
+        ctx = self.connect([])
+        result = client.calc_available_nodes(ctx)
+        self.assertIs(client.calc_available_nodes(ctx), result)
+        self.assertEqual(result[0], self.uncached_available_missions(ctx))
+        self.assertEqual(result[0], [SC2Mission.LIBERATION_DAY.id])
+
+    async def test_new_item_updates_result(self) -> None:
+        ctx = self.connect([])
+        client.calc_available_nodes(ctx)
+        await receive_items(ctx, 0, [MARINE_ID])
+        available_missions = client.calc_available_nodes(ctx)[0]
+        self.assertEqual(available_missions, [SC2Mission.LIBERATION_DAY.id, SC2Mission.ZERO_HOUR.id])
+        self.assertEqual(available_missions, self.uncached_available_missions(ctx))
+
+    async def test_new_victory_updates_result(self) -> None:
+        ctx = self.connect([])
+        client.calc_available_nodes(ctx)
+        ctx.checked_locations.add(client.get_location_id(SC2Mission.LIBERATION_DAY.id, 0))
+        available_missions = client.calc_available_nodes(ctx)[0]
+        self.assertEqual(available_missions, [SC2Mission.LIBERATION_DAY.id, SC2Mission.THE_OUTLAWS.id])
+        self.assertEqual(available_missions, self.uncached_available_missions(ctx))
+
+    async def test_items_resent_from_index_0_update_result(self) -> None:
+        ctx = self.connect([])
+        other_item_id = get_full_item_list()[item_names.MARAUDER].code
+        await receive_items(ctx, 0, [other_item_id])
+        self.assertEqual(client.calc_available_nodes(ctx)[0], [SC2Mission.LIBERATION_DAY.id])
+        await receive_items(ctx, 0, [MARINE_ID])
+        self.assertEqual(
+            client.calc_available_nodes(ctx)[0], [SC2Mission.LIBERATION_DAY.id, SC2Mission.ZERO_HOUR.id]
+        )
+
+
+
+ZERGLING_ID = get_full_item_list()[item_names.ZERGLING].code
+COMBAT_SHIELD_ID = get_full_item_list()[item_names.MARINE_COMBAT_SHIELD].code
+LASER_TARGETING_ID = get_full_item_list()[item_names.MARINE_LASER_TARGETING_SYSTEM].code
+
+
+class TestReceivedCommand(unittest.IsolatedAsyncioTestCase):
+    def received(self, item_ids: typing.List[int], filter_search: str = "") -> typing.List[str]:
+        ctx = make_context()
+        ctx.items_received = [NetworkItem(item_id, 100 + index, 1, 0) for index, item_id in enumerate(item_ids)]
+        with mock.patch.object(ctx, "on_print_json") as on_print_json:
+            client.StarcraftClientProcessor(ctx)._cmd_received(filter_search)
+        on_print_json.assert_called_once()
+        message_parts = on_print_json.call_args[0][0]["data"]
+        return "".join(part["text"] for part in message_parts).split("\n")
+
+    def test_item_category_index_lists_every_item_once(self) -> None:
+        item_table = get_full_item_list()
+        categorized_items, parent_to_child = client._build_item_category_index()
+        indexed_ids = [item_id for item_ids in categorized_items.values() for item_id in item_ids]
+        indexed_ids.extend(item_id for item_ids in parent_to_child.values() for item_id in item_ids)
+        self.assertCountEqual(indexed_ids, [item.code for item in item_table.values()])
+
+        item_names_by_id = {item.code: item_name for item_name, item in item_table.items()}
+        for race, item_ids in categorized_items.items():
+            for item_id in item_ids:
+                item = item_table[item_names_by_id[item_id]]
+                self.assertEqual(item.race, race)
+                self.assertIsNone(item.parent_item)
+        for parent_id, child_ids in parent_to_child.items():
+            for child_id in child_ids:
+                self.assertEqual(item_table[item_names_by_id[child_id]].parent_item, item_names_by_id[parent_id])
+
+    def test_group_search_tables_are_case_insensitive(self) -> None:
+        self.assertEqual(client._CASEFOLD_GROUPS["zerg units"], "Zerg Units")
+        self.assertIn(ZERGLING_ID, client._GROUP_ID_SETS["Zerg Units"])
+        self.assertNotIn(MARINE_ID, client._GROUP_ID_SETS["Zerg Units"])
+
+    async def test_unfiltered_lists_all_items(self) -> None:
+        lines = self.received([MARINE_ID, COMBAT_SHIELD_ID, ZERGLING_ID])
+        self.assertIn(f"* {MARINE_ID} from 100 by 1", lines)
+        self.assertIn(f"  * {COMBAT_SHIELD_ID} from 101 by 1", lines)
+        self.assertIn(f"* {ZERGLING_ID} from 102 by 1", lines)
+        self.assertEqual(lines[-1], "[b]Obtained: 3 items[/b]")
+
+    async def test_group_filter_ignores_case(self) -> None:
+        item_ids = [MARINE_ID, ZERGLING_ID, ZERGLING_ID]
+        lines = self.received(item_ids, "zERG uNITS")
+        self.assertEqual(lines, self.received(item_ids, "Zerg Units")[:-1] + [lines[-1]])
+        self.assertNotIn(f"* {MARINE_ID} from 100 by 1", lines)
+        self.assertEqual(lines[-1], '[b]Filter "zERG uNITS" found 2 out of 3 obtained items[/b]')
+
+    async def test_name_filter_lists_matching_children_under_their_parent(self) -> None:
+        lines = self.received([COMBAT_SHIELD_ID, LASER_TARGETING_ID, ZERGLING_ID], "combat shield")
+        self.assertEqual(lines[1:], [
+            f"- {item_names.MARINE} - not obtained",
+            f"  * {COMBAT_SHIELD_ID} from 100 by 1",
+            "  + 1 child items that don't match the filter",
+            '[b]Filter "combat shield" found 1 out of 3 obtained items[/b]',
+        ])
+
+
+class TestTradeReceive(unittest.IsolatedAsyncioTestCase):
+    async def trade_receive(
+        self, storage: typing.Dict[str, typing.Dict[str, int]], amount: int
+    ) -> typing.Tuple[client.SC2Context, typing.Dict[str, typing.Dict[str, int]]]:
+        ctx = make_context()
+        ctx.trade_storage_team_key = client.TRADE_DATASTORAGE_TEAM + "0"
+        ctx.trade_storage_slot_key = client.TRADE_DATASTORAGE_SLOT + "1"
+        reply = {"value": {client.TRADE_DATASTORAGE_LOCK: 1, **storage}}
+        with mock.patch.object(ctx, "trade_acquire_storage", mock.AsyncMock(return_value=reply)), \
+                mock.patch.object(ctx, "send_msgs", mock.AsyncMock()) as send_msgs:
+            await ctx.trade_receive(amount)
+        [message] = send_msgs.call_args[0][0]
+        self.assertEqual(message["key"], ctx.trade_storage_team_key)
+        [operation] = message["operations"]
+        updated_slots = dict(operation["value"])
+        self.assertEqual(updated_slots.pop(client.TRADE_DATASTORAGE_LOCK), 0)
+        return ctx, updated_slots
+
+    async def test_taking_every_unit_empties_other_slots(self) -> None:
+        storage = {
+            "slot_1": {"Marine": 5},
+            "slot_2": {"Marine": 2, "Zergling": 1},
+            "slot_3": {"Zealot": 1},
+        }
+        ctx, updated_slots = await self.trade_receive(storage, 4)
+        self.assertEqual(ctx.trade_response, "?Trade 0 Marine 2 Zergling 1 Zealot 1")
+        self.assertEqual(updated_slots, {"slot_2": {}, "slot_3": {}})
+
+    async def test_unpicked_units_keep_their_stored_counts(self) -> None:
+        storage = {"slot_2": {"Marine": 2, "Zergling": 0}}
+        ctx, updated_slots = await self.trade_receive(storage, 2)
+        self.assertEqual(ctx.trade_response, "?Trade 0 Marine 2")
+        self.assertEqual(updated_slots, {"slot_2": {"Zergling": 0}})
+
+    async def test_missing_units_are_refunded(self) -> None:
+        ctx, updated_slots = await self.trade_receive({"slot_2": {"Marine": 1}}, 3)
+        self.assertEqual(ctx.trade_response, "?Trade 2 Marine 1")
+        self.assertEqual(updated_slots, {"slot_2": {}})
+
+    async def test_empty_storage_refunds_everything(self) -> None:
+        ctx, updated_slots = await self.trade_receive({"slot_1": {"Marine": 5}}, 2)
+        self.assertEqual(ctx.trade_response, "?Trade 2 ")
+        self.assertEqual(updated_slots, {})
+
+    async def test_sampled_units_are_removed_from_storage(self) -> None:
+        storage = {
+            "slot_2": {"Marine": 3, "Zergling": 4},
+            "slot_3": {"Zealot": 2, "Marine": 1},
+        }
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                random.seed(seed)
+                ctx, updated_slots = await self.trade_receive(storage, 5)
+                response = ctx.trade_response.split()
+                self.assertEqual(response[:2], ["?Trade", "0"])
+                received = {unit: int(count) for unit, count in zip(response[2::2], response[3::2])}
+                self.assertEqual(sum(received.values()), 5)
+                taken: typing.Counter[str] = collections.Counter()
+                for slot, units in updated_slots.items():
+                    self.assertTrue(all(count > 0 for count in units.values()))
+                    taken.update(collections.Counter(storage[slot]) - collections.Counter(units))
+                self.assertEqual(dict(taken), received)
@@ -0,0 +1,72 @@
+"""
+Unit tests for how the SC2 client GUI keeps its mission table up to date
+"""
+import typing
+
+# The test package points local_path at the source tree, which kvui needs to find its data files
+import test  # noqa: F401
+from .test_client import ConnectedClientTestCase
+from .. import client, client_gui
+from ..mission_tables import SC2Mission
+
+LIBERATION_DAY_VICTORY = client.get_location_id(SC2Mission.LIBERATION_DAY.id, 0)
+
+
+class TestMissionTable(ConnectedClientTestCase):
+    def build_manager(self, ctx: client.SC2Context) -> client_gui.SC2Manager:
+        manager = client_gui.SC2Manager(ctx)
+        manager.campaign_panel = client_gui.MultiCampaignLayout()
+        manager.campaign_scroll_panel = client_gui.CampaignScroll()
+        manager.build_mission_table(0)
+        return manager
+
+    def button_states(self, manager: client_gui.SC2Manager) -> typing.Dict[int, typing.Tuple[str, str, bool]]:
+        return {
+            mission_id: (button.text, button.tooltip_text, button.is_exit)
+            for mission_id, button in manager.mission_id_to_button.items()
+        }
+
+    def check_victory(self, ctx: client.SC2Context, location_id: int) -> None:
+        ctx.checked_locations.add(location_id)
+        ctx.missing_locations.discard(location_id)
+
+    async def test_new_check_updates_buttons_in_place(self) -> None:
+        ctx = self.connect([])
+        manager = self.build_manager(ctx)
+        buttons = dict(manager.mission_id_to_button)
+        locked_outlaws = manager.mission_id_to_button[SC2Mission.THE_OUTLAWS.id].text
+
+        self.check_victory(ctx, LIBERATION_DAY_VICTORY)
+        manager.build_mission_table(0)
+
+        self.assertEqual(manager.mission_id_to_button.keys(), buttons.keys())
+        for mission_id, button in manager.mission_id_to_button.items():
+            self.assertIs(button, buttons[mission_id])
+        self.assertNotEqual(manager.mission_id_to_button[SC2Mission.THE_OUTLAWS.id].text, locked_outlaws)
+        self.assertEqual(self.button_states(manager), self.button_states(self.build_manager(ctx)))
+
+    async def test_unchanged_checks_leave_the_table_alone(self) -> None:
+        ctx = self.connect([])
+        manager = self.build_manager(ctx)
+        buttons = dict(manager.mission_id_to_button)
+        states = self.button_states(manager)
+
+        manager.build_mission_table(0)
+
+        self.assertEqual(manager.mission_id_to_button, buttons)
+        self.assertEqual(self.button_states(manager), states)
+
+    async def test_layout_changes_rebuild_the_table(self) -> None:
+        ctx = self.connect([])
+        manager = self.build_manager(ctx)
+        rebuild_triggers = {
+            "new mission order": lambda: setattr(ctx, "custom_mission_order", list(ctx.custom_mission_order)),
+            "data warning": lambda: setattr(ctx, "data_out_of_date", not ctx.data_out_of_date),
+            "reconnect": lambda: setattr(manager, "first_check", True),
+        }
+        for trigger_name, trigger in rebuild_triggers.items():
+            with self.subTest(trigger=trigger_name):
+                old_button = manager.mission_id_to_button[SC2Mission.LIBERATION_DAY.id]
+                trigger()
+                manager.build_mission_table(0)
+                self.assertIsNot(manager.mission_id_to_button[SC2Mission.LIBERATION_DAY.id], old_button)
@@ -2,8 +2,12 @@
 Unit tests for custom mission orders
 """
 
+import json
+from dataclasses import asdict
+
 from .test_base import Sc2SetupTestBase
 from .. import MissionFlag
+from ..mission_order.structs import CampaignSlotData
 from ..item import item_tables, item_names
 from BaseClasses import ItemClassification
 
@@ -213,3 +217,35 @@ class TestCustomMissionOrders(Sc2SetupTestBase):
       self.generate_world(world_options)
       test_items_in_pool = [item for item in self.multiworld.itempool if item.name == test_item]
       self.assertEqual(len(test_items_in_pool), test_amount)
+
+   def test_slot_data_loaders_round_trip(self):
+      world_options = {
+         'mission_order': 'custom',
+         'custom_mission_order': {
+            'test': {
+               'type': 'grid',
+               'size': 6,
+               'max_difficulty': 'easy',
+               'missions': [{
+                  'index': 5,
+                  'entry_rules': [
+                     { 'items': { item_names.MARINE: 1 } },
+                     { 'scope': 'test', 'amount': 2 },
+                     { 'rules': [{ 'scope': '../0' }], 'amount': 1 }
+                  ]
+               }]
+            },
+            'second': {
+               'type': 'column',
+               'size': 2,
+               'entry_rules': [{ 'scope': 'test' }]
+            }
+         }
+      }
+
+      self.generate_world(world_options)
+      slot_data = self.world.fill_slot_data()['custom_mission_order']
+      # The client receives slot data as JSON, which turns the item id keys into strings
+      received_data = json.loads(json.dumps(slot_data))
+      parsed = [CampaignSlotData.parse_from_dict(campaign_data) for campaign_data in received_data]
+      self.assertEqual([asdict(campaign) for campaign in parsed], slot_data)